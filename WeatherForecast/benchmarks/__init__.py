@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# Keep benchmark log output out of the source tree unless WEATHER_LOG_DIR is set
+os.environ.setdefault('WEATHER_LOG_DIR', tempfile.mkdtemp(prefix='weather_benchmark_logs_'))
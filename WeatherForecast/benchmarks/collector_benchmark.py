@@ -0,0 +1,118 @@
+import json
+import tempfile
+import time
+import tracemalloc
+
+from landing_zone.collectors.observation_normalizer import ObservationColumns, iter_features
+from landing_zone.collectors.seattle_weather_collector import STREAM_CHUNK_SIZE, WeatherDataCollector
+from tests.replay_server import FIXTURES_DIR, NWSReplayServer
+
+ENDPOINTS = ['points', 'forecast_hourly', 'stations', 'observations', 'alerts']
+STATION_COUNTS = (10, 100, 1000)
+# Observations per station payload; the collector requests limit=100
+FEATURE_COUNTS = (100, 1000)
+
+
+def run_cycle(station_count, latency=0.0, error_rate=0.0):
+    """
+    Run one full collection cycle against a local replay server.
+
+    Args:
+        station_count: Number of stations advertised by the replay server
+        latency: Per-request latency injected by the server, in seconds
+        error_rate: Fraction of requests the server fails with a 503
+
+    Returns:
+        Dict with cycle time, request count, requests per second and bytes written
+    """
+    with NWSReplayServer(station_count=station_count, latency=latency, error_rate=error_rate) as server, \
+            tempfile.TemporaryDirectory() as data_dir:
+        collector = WeatherDataCollector(base_url=server.base_url, data_dir=data_dir)
+        start = time.perf_counter()
+        collector.fetch_all_data()
+        cycle_time = time.perf_counter() - start
+
+    requests_made = sum(collector.request_latency.count(endpoint=endpoint) for endpoint in ENDPOINTS)
+    bytes_written = sum(collector.bytes_written.value(category=category)
+                        for category in ['observations', 'forecasts', 'alerts', 'stations'])
+    return {
+        'stations': station_count,
+        'cycle_seconds': cycle_time,
+        'requests': requests_made,
+        'requests_per_second': requests_made / cycle_time if cycle_time else 0.0,
+        'bytes_written': bytes_written,
+    }
+
+
+def peak_memory(function):
+    """Return the peak bytes allocated while function runs"""
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure_memory(feature_count):
+    """
+    Compare peak memory of normalizing one station payload decoded whole and streamed.
+
+    The raw body is allocated before measuring in both cases, so the figures
+    understate the whole-body path, which also holds response.content.
+
+    Args:
+        feature_count: Observations in the payload, cycled from the replay fixture
+
+    Returns:
+        Dict with the payload size and the peak bytes of each path
+    """
+    fixture = json.loads((FIXTURES_DIR / 'observations.json').read_text().replace('{station_id}', 'KSEA'))
+    features = [fixture['features'][index % len(fixture['features'])] for index in range(feature_count)]
+    payload = json.dumps({**fixture, 'features': features}).encode('utf-8')
+
+    def whole():
+        ObservationColumns.from_features(json.loads(payload)['features'], 'KSEA')
+
+    def streamed():
+        chunks = (payload[start:start + STREAM_CHUNK_SIZE] for start in range(0, len(payload), STREAM_CHUNK_SIZE))
+        ObservationColumns('KSEA').extend(iter_features(chunks))
+
+    return {'features': feature_count, 'payload_bytes': len(payload),
+            'whole_peak_bytes': peak_memory(whole), 'streamed_peak_bytes': peak_memory(streamed)}
+
+
+def main():
+    """Run the collector benchmark and print one line per station count"""
+    import argparse
+    import logging
+
+    parser = argparse.ArgumentParser(description='Benchmark the weather collector against a local replay server')
+    parser.add_argument('--stations', type=int, nargs='+', default=list(STATION_COUNTS),
+                       help='Station counts to benchmark (default: 10 100 1000)')
+    parser.add_argument('--latency', type=float, default=0.0,
+                       help='Injected per-request latency in seconds (default: 0)')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                       help='Fraction of requests failed with a 503 (default: 0)')
+    parser.add_argument('--features', type=int, nargs='+', default=list(FEATURE_COUNTS),
+                       help='Observations per payload for the memory comparison (default: 100 1000)')
+    args = parser.parse_args()
+
+    # Per-station log lines would dominate the measurement
+    logging.getLogger("weather_collector").setLevel(logging.WARNING)
+
+    print(f"{'stations':>8} {'cycle_s':>10} {'requests':>9} {'req/s':>9} {'bytes_written':>14}")
+    for station_count in args.stations:
+        result = run_cycle(station_count, args.latency, args.error_rate)
+        print(f"{result['stations']:>8} {result['cycle_seconds']:>10.2f} {result['requests']:>9} "
+              f"{result['requests_per_second']:>9.1f} {result['bytes_written']:>14}")
+
+    print(f"\n{'features':>8} {'payload_kb':>11} {'whole_peak_kb':>14} {'streamed_peak_kb':>17}")
+    for feature_count in args.features:
+        result = measure_memory(feature_count)
+        print(f"{result['features']:>8} {result['payload_bytes'] / 1024:>11.1f} "
+              f"{result['whole_peak_bytes'] / 1024:>14.1f} {result['streamed_peak_bytes'] / 1024:>17.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,9 @@ BASE_DIR = Path(__file__).parent.parent
 LANDING_ZONE_DIR = BASE_DIR / "landing_zone"
 RAW_DATA_DIR = LANDING_ZONE_DIR / "raw_data"
 
+# Feature store settings (materialized features read by dbt)
+FEATURE_STORE_DIR = BASE_DIR / "feature_store"
+
 # API settings
 WEATHER_API_BASE_URL = "https://api.weather.gov"
 WEATHER_API_USER_AGENT = "SeattleMetroWeatherAnalysis/1.0"
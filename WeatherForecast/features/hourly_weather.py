@@ -0,0 +1,299 @@
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from config.settings import RAW_DATA_DIR, FEATURE_STORE_DIR
+from utils.logger import setup_logger
+
+# Initialize logger for this module
+logger = setup_logger("weather_features")
+
+# Hour lags used for the rolling temperature deltas
+TEMPERATURE_DELTA_HOURS = (1, 3)
+
+OBSERVATION_COLUMNS = ['location_id', 'hour', 'observed_temperature_c', 'visibility_m', 'weather_condition']
+FORECAST_COLUMNS = ['hour', 'forecast_temperature_c', 'precipitation_probability', 'forecast_condition',
+                    'forecast_generated_at']
+
+# Every hour column is kept at one resolution so frames from Parquet and JSON merge cleanly
+HOUR_DTYPE = 'datetime64[ns, UTC]'
+
+FEATURE_SCHEMA = pa.schema([
+    ('location_id', pa.string()),
+    ('hour', pa.timestamp('s', tz='UTC')),
+    ('temperature_c', pa.float64()),
+    ('observed_temperature_c', pa.float64()),
+    ('forecast_temperature_c', pa.float64()),
+    *[(f'temperature_delta_{lag}h', pa.float64()) for lag in TEMPERATURE_DELTA_HOURS],
+    ('precipitation_probability', pa.float64()),
+    ('visibility_m', pa.float64()),
+    ('weather_condition', pa.string()),
+    ('forecast_condition', pa.string()),
+])
+
+
+def empty_frame(columns):
+    """Return an empty frame with typed hour columns"""
+    return pd.DataFrame({
+        column: pd.Series(dtype=HOUR_DTYPE if column in ('hour', 'forecast_generated_at') else object)
+        for column in columns
+    })
+
+
+class HourlyWeatherFeatureBuilder:
+    """
+    Materializes the hourly ride-demand weather features from the landing zone.
+
+    Only raw files that are new (or rewritten) since the last checkpoint are read.
+    Their hourly aggregates are upserted into two small intermediate tables, and
+    only the date partitions touched by those rows are rebuilt:
+    - hourly_observations.parquet: one row per station and hour
+    - hourly_forecasts.parquet: latest forecast for each hour
+    - hourly_weather_features/date=YYYY-MM-DD/part-0.parquet: the feature table,
+      keyed by (location_id, hour), readable directly by dbt
+    """
+    def __init__(self, raw_data_dir=RAW_DATA_DIR, feature_store_dir=FEATURE_STORE_DIR):
+        self.raw_data_dir = Path(raw_data_dir)
+        self.feature_store_dir = Path(feature_store_dir)
+        self.checkpoint_path = self.feature_store_dir / "_checkpoint.json"
+        self.observations_path = self.feature_store_dir / "hourly_observations.parquet"
+        self.forecasts_path = self.feature_store_dir / "hourly_forecasts.parquet"
+        self.features_dir = self.feature_store_dir / "hourly_weather_features"
+
+    def load_checkpoint(self):
+        """Return the {relative path: mtime} map of raw files already processed"""
+        if not self.checkpoint_path.exists():
+            return {}
+        with open(self.checkpoint_path) as f:
+            return json.load(f).get('files', {})
+
+    def save_checkpoint(self, files):
+        """Atomically persist the processed file map"""
+        tmp_path = self.checkpoint_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'files': files}, f, indent=4, sort_keys=True)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def list_new_files(self, checkpoint):
+        """
+        Find raw files that are not in the checkpoint or have changed since.
+
+        Returns:
+            (new files as {category: [paths]}, current {relative path: mtime} map)
+        """
+        patterns = {'observations': 'station_*.parquet', 'forecasts': 'hourly_forecast_*.json'}
+        new_files = {}
+        current = {}
+        for category, pattern in patterns.items():
+            paths = sorted((self.raw_data_dir / category).glob(pattern), key=os.path.getmtime)
+            new_files[category] = []
+            for path in paths:
+                key = f"{category}/{path.name}"
+                current[key] = os.path.getmtime(path)
+                if checkpoint.get(key) != current[key]:
+                    new_files[category].append(path)
+        return new_files, current
+
+    def read_observations(self, paths):
+        """Aggregate observation files into one row per station and hour"""
+        frames = []
+        for order, path in enumerate(paths):
+            table = pq.read_table(path, columns=['timestamp', 'temperature', 'visibility', 'weatherCondition'])
+            station_id = (table.schema.metadata or {}).get(b'station_id', b'').decode()
+            if not station_id or table.num_rows == 0:
+                continue
+            frame = table.to_pandas()
+            frame['weatherCondition'] = frame['weatherCondition'].astype(object)
+            frame['location_id'] = station_id
+            frame['file_order'] = order
+            frames.append(frame)
+        if not frames:
+            return empty_frame(OBSERVATION_COLUMNS)
+
+        observations = pd.concat(frames, ignore_index=True)
+        observations['hour'] = observations['timestamp'].astype(HOUR_DTYPE).dt.floor('h')
+        # Later files overlap earlier ones; the most recent file's aggregate wins
+        observations = observations[observations['file_order'] ==
+                                    observations.groupby(['location_id', 'hour'])['file_order'].transform('max')]
+        observations = observations.sort_values('timestamp')
+        hourly = observations.groupby(['location_id', 'hour'], as_index=False).agg(
+            observed_temperature_c=('temperature', 'mean'),
+            visibility_m=('visibility', 'mean'),
+            weather_condition=('weatherCondition', 'last'),
+        )
+        return hourly[OBSERVATION_COLUMNS]
+
+    def read_forecasts(self, paths):
+        """Flatten hourly forecast files into one row per hour"""
+        rows = []
+        for path in paths:
+            try:
+                with open(path) as f:
+                    properties = json.load(f).get('properties', {})
+            except (OSError, ValueError) as e:
+                logger.error(f"Error reading forecast file {path}: {str(e)}")
+                continue
+            generated_at = properties.get('generatedAt') or properties.get('updateTime')
+            for period in properties.get('periods', []):
+                temperature = period.get('temperature')
+                unit = period.get('temperatureUnit')
+                if isinstance(temperature, dict):
+                    unit = 'F' if temperature.get('unitCode') == 'wmoUnit:degF' else 'C'
+                    temperature = temperature.get('value')
+                if temperature is not None and unit == 'F':
+                    temperature = (temperature - 32) * 5 / 9
+                precipitation = period.get('probabilityOfPrecipitation') or {}
+                rows.append({
+                    'hour': period.get('startTime'),
+                    'forecast_temperature_c': temperature,
+                    'precipitation_probability': precipitation.get('value'),
+                    'forecast_condition': period.get('shortForecast'),
+                    'forecast_generated_at': generated_at,
+                })
+        if not rows:
+            return empty_frame(FORECAST_COLUMNS)
+
+        forecasts = pd.DataFrame(rows)
+        forecasts['hour'] = pd.to_datetime(forecasts['hour'], utc=True).astype(HOUR_DTYPE).dt.floor('h')
+        forecasts['forecast_generated_at'] = pd.to_datetime(forecasts['forecast_generated_at'],
+                                                            utc=True).astype(HOUR_DTYPE)
+        for column in ('forecast_temperature_c', 'precipitation_probability'):
+            forecasts[column] = pd.to_numeric(forecasts[column], errors='coerce')
+        return self._latest_forecasts(forecasts)
+
+    @staticmethod
+    def _latest_forecasts(forecasts):
+        forecasts = forecasts.sort_values('forecast_generated_at', kind='stable', na_position='first')
+        return forecasts.drop_duplicates('hour', keep='last')[FORECAST_COLUMNS]
+
+    @staticmethod
+    def _upsert(path, new_rows, keys):
+        """Merge new rows into a Parquet table, new rows replacing existing ones with the same keys"""
+        if path.exists():
+            existing = pd.read_parquet(path)
+            existing['hour'] = existing['hour'].astype(HOUR_DTYPE)
+            merged = pd.concat([existing, new_rows], ignore_index=True)
+        else:
+            merged = new_rows
+        merged = merged.drop_duplicates(keys, keep='last').sort_values(keys, ignore_index=True)
+        merged.to_parquet(path, index=False)
+        return merged
+
+    def build_features(self, observations, forecasts, date):
+        """
+        Build the feature rows for one UTC date.
+
+        Rows are every observed station-hour plus every forecast hour for each known
+        station, so future hours carry forecast features. temperature_c is the observed
+        value when available and the forecast otherwise; deltas compare it with the
+        same location a fixed number of hours earlier.
+        """
+        start = pd.Timestamp(date, tz='UTC')
+        end = start + pd.Timedelta(days=1)
+        lookback = start - pd.Timedelta(hours=max(TEMPERATURE_DELTA_HOURS))
+
+        observed = observations[(observations['hour'] >= lookback) & (observations['hour'] < end)]
+        forecast = forecasts[(forecasts['hour'] >= lookback) & (forecasts['hour'] < end)]
+        locations = pd.DataFrame({'location_id': observations['location_id'].unique()})
+        forecast_grid = locations.merge(forecast[['hour']], how='cross')
+
+        features = (pd.concat([observed[['location_id', 'hour']], forecast_grid])
+                    .drop_duplicates()
+                    .merge(observed, on=['location_id', 'hour'], how='left')
+                    .merge(forecast, on='hour', how='left'))
+        features['temperature_c'] = features['observed_temperature_c'].fillna(features['forecast_temperature_c'])
+
+        for lag in TEMPERATURE_DELTA_HOURS:
+            previous = features[['location_id', 'hour', 'temperature_c']].copy()
+            previous['hour'] = previous['hour'] + pd.Timedelta(hours=lag)
+            previous = previous.rename(columns={'temperature_c': 'previous_temperature_c'})
+            merged = features.merge(previous, on=['location_id', 'hour'], how='left')
+            features[f'temperature_delta_{lag}h'] = (merged['temperature_c'] - merged['previous_temperature_c']).values
+
+        features = features[(features['hour'] >= start) & (features['hour'] < end)]
+        features = features.sort_values(['location_id', 'hour'], ignore_index=True)
+        return pa.Table.from_pandas(features[FEATURE_SCHEMA.names], schema=FEATURE_SCHEMA, preserve_index=False)
+
+    def write_partition(self, table, date):
+        """Replace the feature partition for a date"""
+        partition_dir = self.features_dir / f"date={date.isoformat()}"
+        partition_dir.mkdir(parents=True, exist_ok=True)
+        filepath = partition_dir / "part-0.parquet"
+        tmp_path = partition_dir / "part-0.parquet.tmp"
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, filepath)
+        logger.info(f"Wrote {table.num_rows} feature rows to {filepath}")
+
+    def run(self):
+        """
+        Process raw files landed since the last checkpoint and rebuild affected partitions.
+
+        Returns:
+            List of dates whose partitions were rewritten
+        """
+        self.feature_store_dir.mkdir(parents=True, exist_ok=True)
+        checkpoint = self.load_checkpoint()
+        new_files, current = self.list_new_files(checkpoint)
+        logger.info(f"Found {len(new_files['observations'])} new observation files "
+                    f"and {len(new_files['forecasts'])} new forecast files")
+
+        new_observations = self.read_observations(new_files['observations'])
+        new_forecasts = self.read_forecasts(new_files['forecasts'])
+        if new_observations.empty and new_forecasts.empty:
+            self.save_checkpoint(current)
+            return []
+
+        known_locations = set()
+        if self.observations_path.exists():
+            known_locations = set(pd.read_parquet(self.observations_path, columns=['location_id'])['location_id'])
+        observations = self._upsert(self.observations_path, new_observations, ['location_id', 'hour'])
+        if self.forecasts_path.exists():
+            existing = pd.read_parquet(self.forecasts_path)
+            for column in ('hour', 'forecast_generated_at'):
+                existing[column] = existing[column].astype(HOUR_DTYPE)
+            forecasts = self._latest_forecasts(pd.concat([existing, new_forecasts], ignore_index=True))
+        else:
+            forecasts = self._latest_forecasts(new_forecasts)
+        forecasts = forecasts.sort_values('hour', ignore_index=True)
+        forecasts.to_parquet(self.forecasts_path, index=False)
+
+        # Dates touched by new rows, plus the following date when rows near
+        # midnight feed its temperature deltas. A new location gets rows for
+        # every stored forecast hour, so those dates are rebuilt as well.
+        changed_hours = [new_observations['hour'], new_forecasts['hour']]
+        if set(new_observations['location_id']) - known_locations:
+            changed_hours.append(forecasts['hour'])
+        changed_hours = pd.concat(changed_hours)
+        shifted_hours = changed_hours + pd.Timedelta(hours=max(TEMPERATURE_DELTA_HOURS))
+        dates = sorted(set(changed_hours.dt.date) | set(shifted_hours.dt.date))
+
+        for date in dates:
+            self.write_partition(self.build_features(observations, forecasts, date), date)
+
+        # Only advance the checkpoint once every partition is written
+        self.save_checkpoint(current)
+        return dates
+
+
+def main():
+    """Command line entry point for a single incremental materialization run"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Materialize hourly weather features')
+    parser.add_argument('--raw-data-dir', default=str(RAW_DATA_DIR),
+                       help='Landing zone raw data directory')
+    parser.add_argument('--feature-store-dir', default=str(FEATURE_STORE_DIR),
+                       help='Output directory for the feature tables')
+    args = parser.parse_args()
+
+    builder = HourlyWeatherFeatureBuilder(args.raw_data_dir, args.feature_store_dir)
+    dates = builder.run()
+    logger.info(f"Rebuilt {len(dates)} feature partitions")
+
+
+if __name__ == "__main__":
+    main()
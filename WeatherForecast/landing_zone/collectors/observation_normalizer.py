@@ -0,0 +1,270 @@
+import codecs
+import json
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.logger import setup_logger
+
+# Shares the collector's logger so skipped values show up in its log
+logger = setup_logger("weather_collector")
+
+# Observation fields kept from each NWS feature, mapped to the source property name
+MEASUREMENT_FIELDS = {
+    'temperature': 'temperature',
+    'windSpeed': 'windSpeed',
+    'windDirection': 'windDirection',
+    'visibility': 'visibility',
+    'precipitation': 'precipitationLastHour',
+    'relativeHumidity': 'relativeHumidity',
+}
+
+# Canonical unit stored for each field
+CANONICAL_UNITS = {
+    'temperature': 'wmoUnit:degC',
+    'windSpeed': 'wmoUnit:km_h-1',
+    'windDirection': 'wmoUnit:degree_(angle)',
+    'visibility': 'wmoUnit:m',
+    'precipitation': 'wmoUnit:mm',
+    'relativeHumidity': 'wmoUnit:percent',
+}
+
+# (scale, offset) that converts a source unit into the canonical unit: canonical = value * scale + offset
+UNIT_CONVERSIONS = {
+    ('wmoUnit:degF', 'wmoUnit:degC'): (5.0 / 9.0, -32.0 * 5.0 / 9.0),
+    ('wmoUnit:K', 'wmoUnit:degC'): (1.0, -273.15),
+    ('wmoUnit:m_s-1', 'wmoUnit:km_h-1'): (3.6, 0.0),
+    ('wmoUnit:km', 'wmoUnit:m'): (1000.0, 0.0),
+    ('wmoUnit:m', 'wmoUnit:mm'): (1000.0, 0.0),
+}
+
+
+def unit_conversion(field, unit_code):
+    """
+    Return the (scale, offset) that converts unit_code into the canonical unit of field.
+
+    Unknown units raise ValueError rather than being stored unconverted;
+    ObservationColumns stores NaN for such values instead.
+    """
+    canonical = CANONICAL_UNITS[field]
+    if unit_code is None or unit_code == canonical:
+        return 1.0, 0.0
+    try:
+        return UNIT_CONVERSIONS[(unit_code, canonical)]
+    except KeyError:
+        raise ValueError(f"Cannot convert {field} from {unit_code} to {canonical}")
+
+
+def parse_timestamp(value):
+    """Convert an ISO 8601 timestamp into integer seconds since the epoch (UTC)"""
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+class _JSONCursor:
+    """Decodes JSON values one at a time from an iterable of UTF-8 byte chunks"""
+    decoder = json.JSONDecoder()
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.pos = 0
+
+    def _fill(self):
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            return False
+        # Keep only the unconsumed text, so the buffer never holds more than one value plus a chunk
+        self.buffer = self.buffer[self.pos:] + self.text_decoder.decode(chunk)
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Return the next non-whitespace character without consuming it, '' at the end of the stream"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ''
+
+    def skip(self, char):
+        """Consume char if it is next"""
+        if self.peek() == char:
+            self.pos += 1
+            return True
+        return False
+
+    def expect(self, char):
+        if not self.skip(char):
+            raise ValueError(f"Expected {char!r} in GeoJSON stream")
+
+    def value(self):
+        """Decode the next complete JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number ending exactly at the buffer end may continue in the next chunk
+            if end == len(self.buffer) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_features(chunks):
+    """
+    Yield the features of a GeoJSON FeatureCollection from an iterable of byte chunks.
+
+    Only the feature being decoded is held in memory, never the whole payload,
+    so a response body can be consumed straight from the socket.
+    """
+    cursor = _JSONCursor(chunks)
+    cursor.expect('{')
+    while not cursor.skip('}'):
+        key = cursor.value()
+        cursor.expect(':')
+        if key == 'features':
+            cursor.expect('[')
+            while not cursor.skip(']'):
+                yield cursor.value()
+                cursor.skip(',')
+        else:
+            cursor.value()
+        cursor.skip(',')
+
+
+class ObservationColumns:
+    """
+    Columnar representation of the observations returned for one station.
+
+    Features are consumed one at a time and written straight into preallocated
+    typed arrays, so no per-observation dict is built:
+    - timestamps: int64 seconds since the epoch (UTC)
+    - measurements: float64 in the canonical unit of each field, NaN when missing
+      or when the value or its unit cannot be interpreted
+    - weather conditions: list of strings
+    Units are resolved once per field (and again only if the source unit changes).
+    A bad value only affects its own field; features with a malformed timestamp
+    are skipped, and each problem is logged once.
+    """
+    def __init__(self, station_id, capacity=0):
+        self.station_id = station_id
+        self.collected_at = datetime.now(timezone.utc)
+        self.size = 0
+        self.timestamps = np.empty(capacity, dtype=np.int64)
+        self.measurements = {
+            field: np.empty(capacity, dtype=np.float64) for field in MEASUREMENT_FIELDS
+        }
+        self.conditions = []
+        # Last seen source unit and its conversion (None if unconvertible), per field
+        self._units = {field: (None, (1.0, 0.0)) for field in MEASUREMENT_FIELDS}
+        self._warned = set()
+
+    def _warn_once(self, key, message):
+        if key not in self._warned:
+            self._warned.add(key)
+            logger.warning(f"Station {self.station_id}: {message}")
+
+    def _grow(self):
+        capacity = max(16, 2 * len(self.timestamps))
+        self.timestamps = np.resize(self.timestamps, capacity)
+        for field, values in self.measurements.items():
+            self.measurements[field] = np.resize(values, capacity)
+
+    def _convert(self, field, measurement):
+        if not isinstance(measurement, dict):
+            return np.nan
+        value = measurement.get('value')
+        if value is None:
+            return np.nan
+        unit_code = measurement.get('unitCode')
+        cached_unit, conversion = self._units[field]
+        if unit_code != cached_unit:
+            try:
+                conversion = unit_conversion(field, unit_code)
+            except ValueError as e:
+                conversion = None
+                self._warn_once((field, unit_code), f"{str(e)}; storing NaN")
+            self._units[field] = (unit_code, conversion)
+        if conversion is None:
+            return np.nan
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            self._warn_once((field, 'value'), f"Non-numeric {field} value {value!r}; storing NaN")
+            return np.nan
+        scale, offset = conversion
+        return value * scale + offset
+
+    def append(self, props):
+        """Append one feature's properties. Features without a valid timestamp are skipped."""
+        timestamp = props.get('timestamp')
+        if not timestamp:
+            return
+        try:
+            epoch_seconds = parse_timestamp(timestamp)
+        except (AttributeError, ValueError):
+            self._warn_once(('timestamp', None), f"Skipping observation with malformed timestamp {timestamp!r}")
+            return
+        if self.size == len(self.timestamps):
+            self._grow()
+
+        row = self.size
+        self.timestamps[row] = epoch_seconds
+        for field, source in MEASUREMENT_FIELDS.items():
+            self.measurements[field][row] = self._convert(field, props.get(source))
+        self.conditions.append(props.get('textDescription'))
+        self.size += 1
+
+    def extend(self, features):
+        """Append every feature from an iterable of GeoJSON features"""
+        for feature in features:
+            self.append(feature.get('properties') or {})
+        return self
+
+    @classmethod
+    def from_features(cls, features, station_id):
+        """Build the columns for a station from a sequence of GeoJSON features"""
+        capacity = len(features) if hasattr(features, '__len__') else 0
+        return cls(station_id, capacity).extend(features)
+
+    def __len__(self):
+        return self.size
+
+    def to_table(self):
+        """Return the columns as a pyarrow Table, units stored once in the schema metadata"""
+        columns = {
+            'timestamp': pa.array(self.timestamps[:self.size], type=pa.int64())
+                           .cast(pa.timestamp('s', tz='UTC')),
+        }
+        for field, values in self.measurements.items():
+            columns[field] = pa.array(values[:self.size], type=pa.float64(), from_pandas=True)
+        columns['weatherCondition'] = pa.array(self.conditions, type=pa.string()).dictionary_encode()
+
+        metadata = {
+            'station_id': self.station_id,
+            'collected_at': self.collected_at.isoformat(),
+        }
+        metadata.update({f'unit.{field}': unit for field, unit in CANONICAL_UNITS.items()})
+        return pa.table(columns).replace_schema_metadata(metadata)
+
+
+def write_observations(columns, filepath):
+    """Write observation columns to a Parquet file"""
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    pq.write_table(columns.to_table(), filepath)
+    return filepath
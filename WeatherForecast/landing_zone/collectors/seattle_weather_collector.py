@@ -5,10 +5,15 @@ from datetime import datetime, timedelta
 import time
 from pathlib import Path
 from utils.logger import setup_logger
+from utils.metrics import MetricsRegistry
+from landing_zone.collectors.observation_normalizer import ObservationColumns, iter_features, write_observations
 
 # Initialize logger for this module
 logger = setup_logger("weather_collector")
 
+# Bytes read from the socket at a time when a response body is streamed
+STREAM_CHUNK_SIZE = 64 * 1024
+
 class WeatherDataCollector:
     """
     A class that collects weather data for Seattle from the National Weather Service API.
@@ -18,18 +23,38 @@ class WeatherDataCollector:
     3. Handles API interactions with error handling
     4. Manages data retention and scheduled collection
     """
-    def __init__(self, retention_days=30):
+    def __init__(self, retention_days=30, metrics_path=None, base_url="https://api.weather.gov", data_dir=None):
         # API configuration
-        self.base_url = "https://api.weather.gov"  # National Weather Service API endpoint
+        self.base_url = base_url  # National Weather Service API endpoint (overridable for local replay)
         self.headers = {
             "User-Agent": "SeattleMetroWeatherAnalysis/1.0",  # Identify our application to the API
             "Accept": "application/json"  # Specify we want JSON responses
         }
         
         # Data storage and location settings
-        self.data_dir = Path(__file__).parent.parent / "raw_data"  # Base directory for storing data
+        self.data_dir = Path(data_dir) if data_dir else Path(__file__).parent.parent / "raw_data"  # Base directory for storing data
         self.seattle_coords = "47.6062,-122.3321"  # Latitude,Longitude for Seattle
         self.retention_days = retention_days  # How long to keep historical data
+
+        # Instrumentation, exported in Prometheus text format
+        self.metrics_path = metrics_path  # Optional file rewritten after every collection cycle
+        self.metrics = MetricsRegistry()
+        self.request_latency = self.metrics.histogram(
+            'weather_collector_request_duration_seconds', 'NWS API request latency', ['endpoint'])
+        self.response_bytes = self.metrics.counter(
+            'weather_collector_response_bytes_total', 'Bytes received from the NWS API', ['endpoint'])
+        self.request_errors = self.metrics.counter(
+            'weather_collector_request_errors_total', 'Failed NWS API requests', ['endpoint', 'reason'])
+        self.bytes_written = self.metrics.counter(
+            'weather_collector_written_bytes_total', 'Bytes written to the landing zone', ['category'])
+        self.cycle_duration = self.metrics.histogram(
+            'weather_collector_cycle_duration_seconds', 'Duration of a full collection cycle',
+            buckets=(1, 5, 10, 30, 60, 120, 300, 600))
+        self.cycle_failures = self.metrics.counter(
+            'weather_collector_cycle_failures_total', 'Collection cycles that ended with an error', ['stage'])
+        self.cycle_failed_requests = self.metrics.histogram(
+            'weather_collector_cycle_failed_requests', 'Failed NWS API requests per collection cycle',
+            buckets=(0, 1, 2, 5, 10, 25, 50))
         
     def create_data_directories(self):
         """
@@ -79,14 +104,76 @@ class WeatherDataCollector:
         try:
             with open(filepath, 'w') as f:
                 json.dump(data, f, indent=4)
+            self.bytes_written.inc(os.path.getsize(filepath), category=category)
             logger.info(f"Successfully saved data to {filepath}")
         except Exception as e:
             logger.error(f"Error saving data to {filepath}: {str(e)}")
 
+    def save_observation_data(self, columns, filename):
+        """
+        Save normalized observation columns as a Parquet file with timestamp in filename.
+        
+        Args:
+            columns: ObservationColumns for a single station
+            filename: Base name for the file
+        """
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filepath = os.path.join(self.data_dir, 'observations', f"{filename}_{timestamp}.parquet")
+        try:
+            write_observations(columns, filepath)
+            self.bytes_written.inc(os.path.getsize(filepath), category='observations')
+            logger.info(f"Successfully saved {len(columns)} observations to {filepath}")
+        except Exception as e:
+            logger.error(f"Error saving observations to {filepath}: {str(e)}")
+
+    def api_get(self, endpoint, url, params=None, stream=False):
+        """
+        Perform a GET request against the API and record its metrics.
+        
+        Args:
+            endpoint: Short endpoint name used as the metrics label
+            url: Full request URL
+            params: Optional query parameters
+            stream: Leave the body unread; consume it through iter_body, which counts its bytes.
+                Latency then covers the response headers only.
+        """
+        start = time.perf_counter()
+        try:
+            response = requests.get(url, headers=self.headers, params=params, stream=stream)
+        except requests.exceptions.RequestException as e:
+            self.request_errors.inc(endpoint=endpoint, reason=type(e).__name__)
+            raise
+        finally:
+            self.request_latency.observe(time.perf_counter() - start, endpoint=endpoint)
+
+        if not stream:
+            self.response_bytes.inc(len(response.content), endpoint=endpoint)
+        if response.status_code != 200:
+            self.request_errors.inc(endpoint=endpoint, reason=str(response.status_code))
+        return response
+
+    def iter_body(self, endpoint, response):
+        """Yield the body of a streamed response in chunks, counting received bytes"""
+        try:
+            for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+                self.response_bytes.inc(len(chunk), endpoint=endpoint)
+                yield chunk
+        except requests.exceptions.RequestException as e:
+            self.request_errors.inc(endpoint=endpoint, reason=type(e).__name__)
+            raise
+
+    def export_metrics(self):
+        """Write current metrics to metrics_path, if one is configured"""
+        if not self.metrics_path:
+            return
+        try:
+            self.metrics.write_textfile(self.metrics_path)
+        except OSError as e:
+            logger.error(f"Error writing metrics to {self.metrics_path}: {str(e)}")
+
     def get_seattle_point_data(self):
         """Get Seattle grid point and station information"""
-        response = requests.get(f"{self.base_url}/points/{self.seattle_coords}", 
-                              headers=self.headers)
+        response = self.api_get('points', f"{self.base_url}/points/{self.seattle_coords}")
         if response.status_code == 200:
             return response.json()
         return None
@@ -101,31 +188,31 @@ class WeatherDataCollector:
         }
         
         try:
-            response = requests.get(
+            response = self.api_get(
+                'observations',
                 f"{self.base_url}/stations/{station_id}/observations",
-                headers=self.headers,
                 params=params
             )
             
             if response.status_code == 200:
                 data = response.json()
                 if not data['features']:
-                    print(f"No observations found for station {station_id}")
+                    logger.warning(f"No observations found for station {station_id}")
                     return None
                 return data
             else:
-                print(f"Error fetching data for station {station_id}: {response.status_code}")
+                logger.error(f"Error fetching data for station {station_id}: {response.status_code}")
                 return None
             
         except requests.exceptions.RequestException as e:
-            print(f"Request failed for station {station_id}: {str(e)}")
+            logger.error(f"Request failed for station {station_id}: {str(e)}")
             return None
 
     def fetch_hourly_forecast(self, grid_id, grid_x, grid_y):
         """Fetch hourly forecast data"""
-        response = requests.get(
-            f"{self.base_url}/gridpoints/{grid_id}/{grid_x},{grid_y}/forecast/hourly",
-            headers=self.headers
+        response = self.api_get(
+            'forecast_hourly',
+            f"{self.base_url}/gridpoints/{grid_id}/{grid_x},{grid_y}/forecast/hourly"
         )
         if response.status_code == 200:
             return response.json()
@@ -133,10 +220,7 @@ class WeatherDataCollector:
 
     def fetch_alerts(self):
         """Fetch active weather alerts for the area"""
-        response = requests.get(
-            f"{self.base_url}/alerts/active/area/WA",
-            headers=self.headers
-        )
+        response = self.api_get('alerts', f"{self.base_url}/alerts/active/area/WA")
         if response.status_code == 200:
             return response.json()
         return None
@@ -146,7 +230,7 @@ class WeatherDataCollector:
         try:
             # Construct the URL for station observations
             url = f"{self.base_url}/stations/{station_id}/observations"
-            print(f"Fetching from URL: {url}")
+            logger.debug(f"Fetching from URL: {url}")
             
             # Format dates in ISO 8601 format with timezone
             end_time = datetime.now().replace(microsecond=0).isoformat() + 'Z'
@@ -159,58 +243,32 @@ class WeatherDataCollector:
                 'end': end_time
             }
             
-            print(f"Request parameters: {params}")  # Debug print
-            
-            response = requests.get(url, headers=self.headers, params=params)
+            logger.debug(f"Request parameters: {params}")
             
-            if response.status_code == 200:
-                data = response.json()
-                if data.get('features'):
-                    return self.process_weather_data(data, station_id)
+            # The body is decoded one feature at a time as it arrives, never held whole
+            with self.api_get('observations', url, params=params, stream=True) as response:
+                if response.status_code == 200:
+                    columns = ObservationColumns(station_id).extend(
+                        iter_features(self.iter_body('observations', response)))
+                    if len(columns):
+                        return columns
+                    logger.warning(f"No observations found for station {station_id}")
+                    return None
                 else:
-                    print(f"No observations found for station {station_id}")
+                    logger.error(f"Error fetching data for station {station_id}: {response.status_code}")
+                    logger.error(f"Response content: {response.text[:200]}...")  # First 200 chars of response
                     return None
-            else:
-                print(f"Error fetching data for station {station_id}: {response.status_code}")
-                print(f"Response content: {response.text[:200]}...")  # Print first 200 chars of response
-                return None
             
         except Exception as e:
-            print(f"Exception while fetching data for station {station_id}: {str(e)}")
+            logger.error(f"Exception while fetching data for station {station_id}: {str(e)}")
             return None
 
     def process_weather_data(self, data, station_id):
-        """Process the weather data into a useful format"""
-        processed_data = {
-            'station_id': station_id,
-            'timestamp': datetime.now().isoformat(),
-            'observations': []
-        }
-        
-        for feature in data['features']:
-            props = feature.get('properties', {})
-            observation = {
-                'timestamp': props.get('timestamp'),
-                'temperature': self.extract_value(props.get('temperature')),
-                'windSpeed': self.extract_value(props.get('windSpeed')),
-                'windDirection': self.extract_value(props.get('windDirection')),
-                'visibility': self.extract_value(props.get('visibility')),
-                'precipitation': self.extract_value(props.get('precipitationLastHour')),
-                'relativeHumidity': self.extract_value(props.get('relativeHumidity')),
-                'weatherCondition': props.get('textDescription')
-            }
-            processed_data['observations'].append(observation)
-        
-        return processed_data
-
-    def extract_value(self, measurement):
-        """Extract value from measurement object"""
-        if isinstance(measurement, dict):
-            return {
-                'value': measurement.get('value'),
-                'unit': measurement.get('unitCode')
-            }
-        return None
+        """
+        Normalize station observations into per-field typed columns.
+        Units are converted once per field and missing values become NaN.
+        """
+        return ObservationColumns.from_features(data['features'], station_id)
 
     def fetch_all_data(self):
         """
@@ -220,9 +278,11 @@ class WeatherDataCollector:
         3. Fetches forecasts
         4. Collects data from all nearby weather stations
         5. Gets active weather alerts
-        6. Saves everything in organized JSON files
+        6. Saves everything in organized JSON files (observations as Parquet)
         """
         logger.info("Starting data collection process")
+        cycle_start = time.perf_counter()
+        errors_before = self.request_errors.total()
         
         try:
             self.create_data_directories()
@@ -234,6 +294,7 @@ class WeatherDataCollector:
             
             if not point_data:
                 logger.error("Failed to fetch Seattle point data")
+                self.cycle_failures.inc(stage='point_data')
                 return
                 
             self.save_json_data(point_data, 'stations', 'seattle_point_data')
@@ -255,10 +316,7 @@ class WeatherDataCollector:
                 
                 # Fetch observation stations
                 logger.info("Fetching observation stations data")
-                stations_response = requests.get(
-                    properties['observationStations'],
-                    headers=self.headers
-                )
+                stations_response = self.api_get('stations', properties['observationStations'])
                 
                 if stations_response.status_code == 200:
                     stations_data = stations_response.json()
@@ -271,7 +329,7 @@ class WeatherDataCollector:
                             logger.info(f"Processing station: {station_id}")
                             observations = self.fetch_detailed_weather_data(station_id)
                             if observations:
-                                self.save_json_data(observations, 'observations', f'station_{station_id}')
+                                self.save_observation_data(observations, f'station_{station_id}')
                 
                 # Fetch and save alerts
                 logger.info("Fetching weather alerts")
@@ -281,9 +339,18 @@ class WeatherDataCollector:
                 
             except Exception as e:
                 logger.error(f"Error in data collection process: {str(e)}", exc_info=True)
+                self.cycle_failures.inc(stage='collection')
                 
         except Exception as e:
             logger.error(f"Critical error in fetch_all_data: {str(e)}", exc_info=True)
+            self.cycle_failures.inc(stage='setup')
+
+        finally:
+            cycle_time = time.perf_counter() - cycle_start
+            self.cycle_duration.observe(cycle_time)
+            self.cycle_failed_requests.observe(self.request_errors.total() - errors_before)
+            self.export_metrics()
+            logger.info(f"Data collection finished in {cycle_time:.2f} seconds")
 
     def scheduled_collection(self, interval_hours=1):
         """
@@ -331,11 +398,18 @@ def main():
                        help='Collection interval in hours (default: 1.0)')
     parser.add_argument('--retention', type=int, default=30,
                        help='Data retention period in days (default: 30)')
+    parser.add_argument('--metrics-file',
+                       help='Write Prometheus metrics to this file after every collection')
+    parser.add_argument('--metrics-port', type=int,
+                       help='Serve Prometheus metrics on this local port')
     
     args = parser.parse_args()
     
     # Initialize collector with specified retention period
-    fetcher = WeatherDataCollector(retention_days=args.retention)
+    fetcher = WeatherDataCollector(retention_days=args.retention, metrics_path=args.metrics_file)
+    if args.metrics_port:
+        fetcher.metrics.start_http_server(args.metrics_port)
+        logger.info(f"Serving metrics on http://127.0.0.1:{args.metrics_port}/metrics")
     
     # Run in either scheduled or one-time mode
     if args.schedule:
@@ -0,0 +1,16 @@
+-- Hourly, location-keyed ride-demand weather features.
+-- Materialized incrementally by features/hourly_weather.py as date-partitioned Parquet.
+select
+    location_id,
+    hour,
+    temperature_c,
+    observed_temperature_c,
+    forecast_temperature_c,
+    temperature_delta_1h,
+    temperature_delta_3h,
+    precipitation_probability,
+    visibility_m,
+    weather_condition,
+    forecast_condition,
+    cast(date as date) as feature_date
+from read_parquet('{{ var("hourly_weather_features_path") }}', hive_partitioning = true)
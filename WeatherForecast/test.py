@@ -1,8 +1,8 @@
 # test_weather.py
-from WeatherForecast.landing_zone.collectors.seattle_weather_collector import WeatherDataFetcher
+from landing_zone.collectors.seattle_weather_collector import WeatherDataCollector
 
 def test_fetch():
-    fetcher = WeatherDataFetcher()
+    fetcher = WeatherDataCollector()
     print("Starting weather data collection...")
     fetcher.fetch_all_data()
     print("Completed weather data collection")
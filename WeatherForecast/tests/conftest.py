@@ -0,0 +1,6 @@
+import os
+import tempfile
+
+# Loggers are created when collector modules are imported, so the log directory
+# must be redirected before any test module is collected
+os.environ.setdefault('WEATHER_LOG_DIR', tempfile.mkdtemp(prefix='weather_logs_'))
@@ -0,0 +1,117 @@
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlparse
+
+# Recorded NWS API payloads; "{base_url}" and "{station_id}" are filled in when served
+FIXTURES_DIR = Path(__file__).parent / "fixtures" / "nws"
+
+
+class NWSReplayServer:
+    """
+    Local stand-in for api.weather.gov that serves recorded fixtures.
+
+    Mimics the endpoints used by WeatherDataCollector:
+    - /points/{lat},{lon}
+    - /gridpoints/{office}/{x},{y}/forecast/hourly
+    - /gridpoints/{office}/{x},{y}/stations (returns `station_count` stations)
+    - /stations/{station_id}/observations
+    - /alerts/active/area/{state}
+
+    Args:
+        station_count: Number of observation stations to advertise
+        latency: Seconds to wait before answering each request
+        error_rate: Fraction of requests answered with a 503 problem response
+        seed: Seed for the error injection random generator
+    """
+    ROUTES = [
+        (re.compile(r'^/points/[-\d.]+,[-\d.]+$'), 'points'),
+        (re.compile(r'^/gridpoints/\w+/\d+,\d+/forecast/hourly$'), 'forecast_hourly'),
+        (re.compile(r'^/gridpoints/\w+/\d+,\d+/stations$'), 'stations'),
+        (re.compile(r'^/stations/(?P<station_id>\w+)/observations$'), 'observations'),
+        (re.compile(r'^/alerts/active/area/\w+$'), 'alerts'),
+    ]
+
+    def __init__(self, station_count=3, latency=0.0, error_rate=0.0, seed=0):
+        self.station_count = station_count
+        self.latency = latency
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._fixtures = {path.stem: path.read_text() for path in FIXTURES_DIR.glob('*.json')}
+        self.request_counts = {}
+        self._server = None
+        self.base_url = None
+
+    def render(self, name, **values):
+        """Return a fixture as a dict with placeholders filled in"""
+        text = self._fixtures[name].replace('{base_url}', self.base_url)
+        for key, value in values.items():
+            text = text.replace('{' + key + '}', value)
+        return json.loads(text)
+
+    def station_ids(self):
+        return [f"RPL{index:04d}" for index in range(self.station_count)]
+
+    def build_response(self, path):
+        """Return (status, payload) for a request path"""
+        for pattern, endpoint in self.ROUTES:
+            match = pattern.match(path)
+            if not match:
+                continue
+            with self._lock:
+                self.request_counts[endpoint] = self.request_counts.get(endpoint, 0) + 1
+                fail = self.error_rate and self._random.random() < self.error_rate
+            if fail:
+                return 503, {'title': 'Service Unavailable', 'status': 503, 'detail': 'Injected error'}
+            if endpoint == 'stations':
+                payload = self.render('stations')
+                payload['features'] = [self.render('station', station_id=sid) for sid in self.station_ids()]
+                payload['observationStations'] = [f"{self.base_url}/stations/{sid}" for sid in self.station_ids()]
+                return 200, payload
+            return 200, self.render(endpoint, **match.groupdict())
+        return 404, {'title': 'Not Found', 'status': 404, 'detail': f"No replay route for {path}"}
+
+    def start(self, port=0):
+        """Start serving on a local port in a daemon thread and return the base URL"""
+        replay = self
+
+        class ReplayHandler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                if replay.latency:
+                    time.sleep(replay.latency)
+                status, payload = replay.build_response(urlparse(self.path).path)
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/geo+json' if status == 200 else 'application/problem+json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), ReplayHandler)
+        self._server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self.base_url
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
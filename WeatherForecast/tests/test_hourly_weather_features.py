@@ -0,0 +1,102 @@
+import json
+import math
+import pyarrow.parquet as pq
+from features.hourly_weather import HourlyWeatherFeatureBuilder
+from landing_zone.collectors.observation_normalizer import ObservationColumns, write_observations
+
+
+def write_station_file(raw_dir, name, station_id, readings):
+    features = [
+        {'properties': {
+            'timestamp': timestamp,
+            'temperature': {'value': value, 'unitCode': 'wmoUnit:degC'},
+            'textDescription': 'Cloudy',
+        }}
+        for timestamp, value in readings
+    ]
+    columns = ObservationColumns.from_features(features, station_id)
+    write_observations(columns, str(raw_dir / 'observations' / f'{name}.parquet'))
+
+
+def write_forecast_file(raw_dir, name, periods):
+    path = raw_dir / 'forecasts' / f'{name}.json'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({'properties': {
+        'generatedAt': '2024-01-01T00:00:00+00:00',
+        'periods': [
+            {
+                'startTime': start,
+                'temperature': fahrenheit,
+                'temperatureUnit': 'F',
+                'probabilityOfPrecipitation': {'unitCode': 'wmoUnit:percent', 'value': probability},
+                'shortForecast': 'Light Rain',
+            }
+            for start, fahrenheit, probability in periods
+        ],
+    }}))
+
+
+def read_partition(builder, date):
+    return pq.read_table(builder.features_dir / f'date={date}' / 'part-0.parquet').to_pylist()
+
+
+# Test that a first run builds location-keyed hourly rows with deltas and forecast features
+def test_builds_hourly_features(tmp_path):
+    raw_dir = tmp_path / 'raw_data'
+    write_station_file(raw_dir, 'station_KSEA_1', 'KSEA', [
+        ('2024-01-01T10:10:00+00:00', 4.0),
+        ('2024-01-01T10:50:00+00:00', 6.0),
+        ('2024-01-01T11:15:00+00:00', 8.0),
+    ])
+    write_forecast_file(raw_dir, 'hourly_forecast_1', [
+        ('2024-01-01T04:00:00-08:00', 50, 80),  # 12:00 UTC
+    ])
+    builder = HourlyWeatherFeatureBuilder(raw_dir, tmp_path / 'feature_store')
+
+    assert [str(date) for date in builder.run()] == ['2024-01-01']
+    rows = read_partition(builder, '2024-01-01')
+
+    assert [(row['location_id'], row['hour'].hour) for row in rows] == [('KSEA', 10), ('KSEA', 11), ('KSEA', 12)]
+    assert rows[0]['temperature_c'] == 5.0
+    assert rows[0]['temperature_delta_1h'] is None
+    assert rows[1]['temperature_delta_1h'] == 3.0
+    # Future hour is carried by the forecast, converted to Celsius
+    assert rows[2]['observed_temperature_c'] is None
+    assert math.isclose(rows[2]['temperature_c'], 10.0)
+    assert math.isclose(rows[2]['temperature_delta_1h'], 2.0)
+    assert rows[2]['precipitation_probability'] == 80
+    assert rows[2]['forecast_condition'] == 'Light Rain'
+
+
+# Test that later runs only read newly landed files and only rewrite touched dates
+def test_incremental_runs_use_checkpoint(tmp_path):
+    raw_dir = tmp_path / 'raw_data'
+    write_station_file(raw_dir, 'station_KSEA_1', 'KSEA', [('2024-01-01T10:00:00+00:00', 4.0)])
+    builder = HourlyWeatherFeatureBuilder(raw_dir, tmp_path / 'feature_store')
+    builder.run()
+
+    assert builder.run() == []
+
+    write_station_file(raw_dir, 'station_KSEA_2', 'KSEA', [('2024-01-02T23:00:00+00:00', 7.0)])
+    new_files, _ = builder.list_new_files(builder.load_checkpoint())
+    assert [path.name for path in new_files['observations']] == ['station_KSEA_2.parquet']
+
+    assert [str(date) for date in builder.run()] == ['2024-01-02', '2024-01-03']
+    assert len(read_partition(builder, '2024-01-01')) == 1
+    assert read_partition(builder, '2024-01-02')[0]['temperature_c'] == 7.0
+
+
+# Test that forecasts landing before a station's first observation still reach its future hours
+def test_forecast_before_observation(tmp_path):
+    raw_dir = tmp_path / 'raw_data'
+    write_forecast_file(raw_dir, 'hourly_forecast_1', [('2024-01-02T12:00:00+00:00', 50, 80)])
+    builder = HourlyWeatherFeatureBuilder(raw_dir, tmp_path / 'feature_store')
+    builder.run()
+    assert read_partition(builder, '2024-01-02') == []
+
+    write_station_file(raw_dir, 'station_KSEA_1', 'KSEA', [('2024-01-01T10:00:00+00:00', 4.0)])
+
+    assert [str(date) for date in builder.run()] == ['2024-01-01', '2024-01-02']
+    rows = read_partition(builder, '2024-01-02')
+    assert [(row['location_id'], row['hour'].hour) for row in rows] == [('KSEA', 12)]
+    assert math.isclose(rows[0]['temperature_c'], 10.0)
@@ -0,0 +1,82 @@
+import logging.handlers
+import urllib.request
+from landing_zone.collectors.seattle_weather_collector import WeatherDataCollector
+from utils.logger import setup_logger
+from utils.metrics import MetricsRegistry
+
+
+class FakeResponse:
+    status_code = 503
+    content = b'{"detail": "unavailable"}'
+
+
+# Test that counters and histograms render in Prometheus text format
+def test_registry_renders_prometheus_text():
+    registry = MetricsRegistry()
+    errors = registry.counter('errors_total', 'Errors', ['endpoint'])
+    latency = registry.histogram('latency_seconds', 'Latency', ['endpoint'], buckets=(0.1, 1.0))
+
+    errors.inc(endpoint='alerts')
+    errors.inc(2, endpoint='alerts')
+    latency.observe(0.5, endpoint='alerts')
+
+    text = registry.render()
+    assert '# TYPE errors_total counter' in text
+    assert 'errors_total{endpoint="alerts"} 3' in text
+    assert 'latency_seconds_bucket{endpoint="alerts",le="0.1"} 0' in text
+    assert 'latency_seconds_bucket{endpoint="alerts",le="1.0"} 1' in text
+    assert 'latency_seconds_bucket{endpoint="alerts",le="+Inf"} 1' in text
+    assert 'latency_seconds_count{endpoint="alerts"} 1' in text
+
+
+# Test that the local HTTP endpoint serves the same text
+def test_registry_http_endpoint():
+    registry = MetricsRegistry()
+    registry.counter('cycles_total', 'Cycles').inc()
+    server = registry.start_http_server(0)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        body = urllib.request.urlopen(url).read().decode()
+    finally:
+        registry.stop_http_server()
+    assert 'cycles_total 1' in body
+
+
+# Test that API requests are timed and failures are counted per endpoint
+def test_collector_records_request_metrics(monkeypatch, tmp_path):
+    monkeypatch.setattr('requests.get', lambda *args, **kwargs: FakeResponse())
+    collector = WeatherDataCollector(metrics_path=tmp_path / 'collector.prom')
+
+    assert collector.fetch_alerts() is None
+    collector.export_metrics()
+
+    assert collector.request_latency.count(endpoint='alerts') == 1
+    assert collector.response_bytes.value(endpoint='alerts') == len(FakeResponse.content)
+    assert collector.request_errors.value(endpoint='alerts', reason='503') == 1
+    assert 'weather_collector_request_errors_total{endpoint="alerts",reason="503"} 1' in \
+        (tmp_path / 'collector.prom').read_text()
+
+
+# Test that failed collection cycles and the requests that failed within them are counted
+def test_collector_counts_failed_cycles(monkeypatch, tmp_path):
+    monkeypatch.setattr('requests.get', lambda *args, **kwargs: FakeResponse())
+    collector = WeatherDataCollector(data_dir=tmp_path / 'raw_data')
+
+    collector.fetch_all_data()
+    monkeypatch.setattr(FakeResponse, 'json', lambda self: {'properties': {}}, raising=False)
+    monkeypatch.setattr(FakeResponse, 'status_code', 200)
+    collector.fetch_all_data()
+
+    assert collector.cycle_failures.value(stage='point_data') == 1
+    assert collector.cycle_failures.value(stage='collection') == 1
+    assert collector.cycle_failed_requests.count() == 2
+    assert 'weather_collector_cycle_failed_requests_sum 1.0' in collector.metrics.render()
+
+
+# Test that setting up the same logger twice does not duplicate handlers
+def test_setup_logger_is_idempotent():
+    first = setup_logger("metrics_test")
+    second = setup_logger("metrics_test")
+    assert first is second
+    assert len(first.handlers) == 1
+    assert isinstance(first.handlers[0], logging.handlers.QueueHandler)
@@ -0,0 +1,88 @@
+import json
+import math
+import pyarrow.parquet as pq
+import pytest
+from landing_zone.collectors.observation_normalizer import ObservationColumns, iter_features, write_observations
+
+
+def make_feature(timestamp, temperature, unit='wmoUnit:degC', condition='Cloudy'):
+    return {
+        'properties': {
+            'timestamp': timestamp,
+            'temperature': {'value': temperature, 'unitCode': unit},
+            'windSpeed': {'value': 3.0, 'unitCode': 'wmoUnit:m_s-1'},
+            'precipitationLastHour': {'value': None, 'unitCode': 'wmoUnit:mm'},
+            'textDescription': condition,
+        }
+    }
+
+
+# Test that features are stored as typed columns in canonical units
+def test_columns_are_typed_and_normalized():
+    features = [
+        make_feature('2024-01-01T00:00:00+00:00', 10.0),
+        make_feature('2024-01-01T01:00:00Z', 50.0, unit='wmoUnit:degF'),
+        {'properties': {'temperature': {'value': 1.0}}},  # no timestamp, skipped
+    ]
+    columns = ObservationColumns.from_features(features, 'KSEA')
+
+    assert len(columns) == 2
+    assert columns.timestamps.dtype.name == 'int64'
+    assert list(columns.timestamps[:2]) == [1704067200, 1704070800]
+    assert columns.measurements['temperature'][1] == 10.0
+    assert math.isclose(columns.measurements['windSpeed'][0], 10.8)
+    # Missing values become NaN rather than dicts of None
+    assert math.isnan(columns.measurements['precipitation'][0])
+    assert math.isnan(columns.measurements['visibility'][0])
+
+
+# Test that the Parquet output keeps nulls and records units once in the schema
+def test_write_observations_to_parquet(tmp_path):
+    features = [make_feature(f'2024-01-01T00:{minute:02d}:00+00:00', float(minute)) for minute in range(40)]
+    columns = ObservationColumns.from_features(iter(features), 'KSEA')
+
+    filepath = write_observations(columns, str(tmp_path / 'observations' / 'station_KSEA.parquet'))
+    table = pq.read_table(filepath)
+
+    assert table.num_rows == 40
+    assert table.column('precipitation').null_count == 40
+    assert table.column('temperature').to_pylist()[-1] == 39.0
+    assert table.schema.metadata[b'station_id'] == b'KSEA'
+    assert table.schema.metadata[b'unit.temperature'] == b'wmoUnit:degC'
+
+
+# Test that an unknown unit or bad timestamp only drops the affected values
+def test_unknown_unit_and_bad_timestamp_keep_other_values(caplog):
+    features = [
+        make_feature('2024-01-01T00:00:00+00:00', 10.0, unit='wmoUnit:furlong'),
+        make_feature('2024-01-01T01:00:00+00:00', 11.0, unit='wmoUnit:furlong'),
+        make_feature('not-a-timestamp', 12.0),
+        make_feature('2024-01-01T02:00:00+00:00', 13.0),
+    ]
+    columns = ObservationColumns.from_features(features, 'KSEA')
+
+    assert len(columns) == 3
+    assert math.isnan(columns.measurements['temperature'][0])
+    assert math.isnan(columns.measurements['temperature'][1])
+    assert columns.measurements['temperature'][2] == 13.0
+    # Other fields of the affected observations are kept
+    assert math.isclose(columns.measurements['windSpeed'][0], 10.8)
+    # One warning for the unknown unit however often it repeats, one for the bad timestamp
+    warnings = [record.getMessage() for record in caplog.records if record.levelname == 'WARNING']
+    assert len(warnings) == 2
+    assert 'Cannot convert temperature from wmoUnit:furlong' in warnings[0]
+    assert "malformed timestamp 'not-a-timestamp'" in warnings[1]
+
+
+# Test that features are decoded incrementally however the payload is split into chunks
+def test_iter_features_across_chunk_boundaries():
+    features = [make_feature(f'2024-01-01T00:{minute:02d}:00+00:00', minute + 0.5, condition='Brouillard épais')
+                for minute in range(5)]
+    payload = json.dumps({'@context': [{'features': 'not this'}], 'type': 'FeatureCollection',
+                          'features': features, 'pagination': {'next': None}}).encode('utf-8')
+
+    for size in (1, 7, len(payload)):
+        chunks = (payload[start:start + size] for start in range(0, len(payload), size))
+        assert list(iter_features(chunks)) == features
+    with pytest.raises(ValueError):
+        list(iter_features([payload[:len(payload) // 2]]))
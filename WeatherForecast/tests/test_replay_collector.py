@@ -0,0 +1,31 @@
+import requests
+from landing_zone.collectors.seattle_weather_collector import WeatherDataCollector
+from tests.replay_server import NWSReplayServer
+
+
+# Test a full collection cycle against the local replay server
+def test_fetch_all_data_against_replay_server(tmp_path):
+    with NWSReplayServer(station_count=3) as server:
+        collector = WeatherDataCollector(base_url=server.base_url, data_dir=tmp_path)
+        collector.fetch_all_data()
+
+    assert server.request_counts == {
+        'points': 1, 'forecast_hourly': 1, 'stations': 1, 'observations': 3, 'alerts': 1,
+    }
+    assert len(list((tmp_path / 'observations').glob('station_RPL*.parquet'))) == 3
+    assert len(list((tmp_path / 'forecasts').glob('hourly_forecast_*.json'))) == 1
+    assert len(list((tmp_path / 'alerts').glob('alerts_*.json'))) == 1
+    assert collector.bytes_written.value(category='observations') > 0
+
+
+# Test that injected errors are surfaced as failed requests and counted
+def test_replay_server_error_injection(tmp_path):
+    with NWSReplayServer(station_count=5, error_rate=1.0) as server:
+        response = requests.get(f"{server.base_url}/alerts/active/area/WA")
+        collector = WeatherDataCollector(base_url=server.base_url, data_dir=tmp_path)
+        collector.fetch_all_data()
+
+    assert response.status_code == 503
+    assert response.json()['detail'] == 'Injected error'
+    assert collector.request_errors.value(endpoint='points', reason='503') == 1
+    assert not list((tmp_path / 'stations').glob('*.json'))
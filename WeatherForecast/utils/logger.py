@@ -1,26 +1,68 @@
+import atexit
 import logging
-from pathlib import Path
+import logging.handlers
 import os
+import queue
+from pathlib import Path
+
+# Shared queue drained by a single background listener thread, so that
+# file and console writes never block the code doing the logging
+_log_queue = queue.Queue(-1)
+_listener = None
+_handlers = {}
+
+# Log files go here unless WEATHER_LOG_DIR points elsewhere (tests and benchmarks do)
+DEFAULT_LOG_DIR = Path(__file__).parent.parent / "logs"
+
+
+def _get_listener():
+    global _listener
+    if _listener is None:
+        _listener = logging.handlers.QueueListener(_log_queue, respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logging)
+    return _listener
+
+
+def stop_logging():
+    """Flush queued records and stop the background listener"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
 
 def setup_logger(name):
-    # Create logs directory if it doesn't exist
-    log_dir = Path(__file__).parent.parent / "logs"
-    log_dir.mkdir(exist_ok=True)
-    
     logger = logging.getLogger(name)
+    # Calling setup_logger again for the same name returns the configured logger
+    # instead of attaching a second set of handlers
+    if name in _handlers:
+        return logger
+
+    # Create logs directory if it doesn't exist
+    log_dir = Path(os.getenv('WEATHER_LOG_DIR', DEFAULT_LOG_DIR))
+    log_dir.mkdir(parents=True, exist_ok=True)
+
     logger.setLevel(logging.INFO)
-    
+    logger.propagate = False
+
     # Create handlers
     file_handler = logging.FileHandler(log_dir / f"{name}.log")
     console_handler = logging.StreamHandler()
-    
+
     # Create formatters and add it to handlers
     log_format = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     file_handler.setFormatter(log_format)
     console_handler.setFormatter(log_format)
-    
-    # Add handlers to the logger
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
-    
-    return logger
\ No newline at end of file
+
+    # Only records from this logger reach its file
+    file_handler.addFilter(logging.Filter(name))
+    console_handler.addFilter(logging.Filter(name))
+
+    # The listener owns the real handlers; the logger only enqueues records
+    listener = _get_listener()
+    listener.handlers = listener.handlers + (file_handler, console_handler)
+    _handlers[name] = (file_handler, console_handler)
+    logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+
+    return logger
@@ -0,0 +1,90 @@
+import time
+
+from config.salesforce_connection import SalesforceClient
+from tests.fake_salesforce import FakeSalesforceServer
+
+
+def make_records(count):
+    accounts = [{'Id': f'001{index:015d}', 'Name': f'Account {index}'} for index in range(count)]
+    contacts = [{'Id': f'003{index:015d}', 'LastName': f'Contact {index}', 'AccountId': accounts[index]['Id']}
+                for index in range(count)]
+    return accounts, contacts
+
+
+def timed(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def run(record_count=200, latency=0.05):
+    """
+    Compare sequential REST calls with batched requests against a fake server.
+
+    Args:
+        record_count: Number of records looked up by each strategy
+        latency: Per-round-trip latency injected by the fake server, in seconds
+
+    Returns:
+        List of (workload, strategy, round trips, seconds)
+    """
+    accounts, contacts = make_records(record_count)
+    results = []
+    with FakeSalesforceServer(latency=latency) as server:
+        server.add_records('Account', accounts)
+        server.add_records('Contact', contacts)
+        with SalesforceClient(login_url=server.login_url, username=server.username,
+                              password=server.password, security_token='') as client:
+            client.authenticate()
+            account_paths = [f"sobjects/Account/{account['Id']}" for account in accounts]
+            account_ids = [account['Id'] for account in accounts]
+
+            def measure(workload, strategy, function):
+                server.request_log.clear()
+                seconds = timed(function)
+                results.append((workload, strategy, len(server.api_requests()), seconds))
+
+            # Independent GETs of known records
+            measure('independent GETs', 'sequential', lambda: [client.get(path) for path in account_paths])
+            measure('independent GETs', 'composite batch', lambda: client.get_many(account_paths))
+            measure('independent GETs', 'sObject collections',
+                    lambda: client.retrieve_records('Account', account_ids, ['Id', 'Name']))
+
+            # Contact followed by a lookup of its account
+            def sequential_lookups():
+                for contact in contacts:
+                    account_id = client.get(f"sobjects/Contact/{contact['Id']}")['AccountId']
+                    client.get(f"sobjects/Account/{account_id}")
+
+            def composite_lookups():
+                subrequests = []
+                for index, contact in enumerate(contacts):
+                    subrequests.append({'method': 'GET', 'url': f"sobjects/Contact/{contact['Id']}",
+                                        'referenceId': f'contact{index}'})
+                    subrequests.append({'method': 'GET', 'url': f'sobjects/Account/@{{contact{index}.AccountId}}',
+                                        'referenceId': f'account{index}'})
+                client.composite(subrequests)
+
+            measure('dependent lookups', 'sequential', sequential_lookups)
+            measure('dependent lookups', 'composite', composite_lookups)
+    return results
+
+
+def main():
+    """Run the composite benchmark and print one line per strategy"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark batched Salesforce requests against sequential calls')
+    parser.add_argument('--records', type=int, default=200,
+                       help='Records looked up per strategy (default: 200)')
+    parser.add_argument('--latency', type=float, default=0.05,
+                       help='Injected per-round-trip latency in seconds (default: 0.05)')
+    args = parser.parse_args()
+
+    print(f"{'workload':<18} {'strategy':<20} {'round_trips':>11} {'seconds':>9}")
+    for workload, strategy, round_trips, seconds in run(args.records, args.latency):
+        print(f"{workload:<18} {strategy:<20} {round_trips:>11} {seconds:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,15 @@
 
-import requests
+import json
 import os
-from dotenv import load_dotenv
+import re
+import threading
+import time
 from pathlib import Path
 
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
 
 # Load .env file from root directory
 env_path = Path(__file__).parent.parent / '.env'  # Goes up from config/ to workspace/
@@ -12,47 +18,350 @@ load_dotenv(env_path)
 
 
 # Parameters from your config
-LOGIN_URL = "https://login.salesforce.com/services/oauth2/token"
+LOGIN_URL = os.getenv('SALESFORCE_LOGIN_URL', "https://login.salesforce.com/services/oauth2/token")
 CLIENT_ID = os.getenv('SALESFORCE_CLIENT_ID')
 CLIENT_SECRET = os.getenv('SALESFORCE_CLIENT_SECRET')
 USERNAME = os.getenv('SALESFORCE_USERNAME')
 PASSWORD = os.getenv('SALESFORCE_PASSWORD')
 SECURITY_TOKEN = os.getenv('SALESFORCE_SECURITY_TOKEN')
+API_VERSION = os.getenv('SALESFORCE_API_VERSION', '58.0')
+
+# Optional file that lets separate scripts share one access token
+TOKEN_CACHE_PATH = os.getenv('SALESFORCE_TOKEN_CACHE')
+# Password-grant tokens carry no expiry; assume the default 2 hour session timeout
+TOKEN_LIFETIME_SECONDS = int(os.getenv('SALESFORCE_TOKEN_LIFETIME', 7200))
+
+# Platform limits for batched requests
+COMPOSITE_MAX_SUBREQUESTS = 25
+# Of which query, queryAll and sObject Collections subrequests
+COMPOSITE_MAX_QUERY_SUBREQUESTS = 5
+COMPOSITE_BATCH_MAX_SUBREQUESTS = 25
+COLLECTIONS_MAX_RETRIEVE = 2000
+
+# @{referenceId.field} placeholders linking composite subrequests
+REFERENCE_PATTERN = re.compile(r'@\{(\w+)[.\[]')
+# Subrequest URLs counted against COMPOSITE_MAX_QUERY_SUBREQUESTS
+QUERY_SUBREQUEST_PATTERN = re.compile(r'^/?(?:services/data/v[\d.]+/)?(?:query|queryAll|composite/sobjects)(?:[/?]|$)')
+
+
+class SalesforceError(Exception):
+    """Raised when Salesforce answers a request with an error status"""
+    def __init__(self, message, status_code=None, errors=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.errors = errors
+
+
+class SalesforceClient:
+    """
+    Reusable Salesforce REST client.
+
+    - Authenticates lazily with the OAuth2 password grant on the first request
+    - Caches the access token and instance_url in memory, and optionally in a
+      token cache file so separate scripts authenticate once per token lifetime
+    - Reuses one pooled HTTP session for every call
+    - Re-authenticates transparently once when a request returns 401
+    """
+    def __init__(self, login_url=LOGIN_URL, client_id=CLIENT_ID, client_secret=CLIENT_SECRET,
+                 username=USERNAME, password=PASSWORD, security_token=SECURITY_TOKEN,
+                 api_version=API_VERSION, token_cache_path=TOKEN_CACHE_PATH,
+                 token_lifetime=TOKEN_LIFETIME_SECONDS, pool_size=10, timeout=60):
+        self.login_url = login_url
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.username = username
+        self.password = password
+        self.security_token = security_token
+        self.api_version = api_version
+        self.token_cache_path = Path(token_cache_path) if token_cache_path else None
+        self.token_lifetime = token_lifetime
+        self.timeout = timeout
+
+        # Pooled session shared by authentication and API calls
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self.access_token = None
+        self.instance_url = None
+        self.token_expires_at = 0
+        self.auth_count = 0  # Number of OAuth round trips made by this client
+        self._auth_lock = threading.Lock()
+
+    @property
+    def base_path(self):
+        return f"/services/data/v{self.api_version}"
+
+    def _token_valid(self):
+        return self.access_token is not None and time.time() < self.token_expires_at
+
+    def _load_cached_token(self):
+        if not self.token_cache_path or not self.token_cache_path.exists():
+            return False
+        try:
+            with open(self.token_cache_path) as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if cached.get('login_url') != self.login_url or cached.get('username') != self.username:
+            return False
+        self.access_token = cached.get('access_token')
+        self.instance_url = cached.get('instance_url')
+        self.token_expires_at = cached.get('expires_at', 0)
+        return self._token_valid()
+
+    def _save_cached_token(self):
+        if not self.token_cache_path:
+            return
+        cached = {
+            'login_url': self.login_url,
+            'username': self.username,
+            'access_token': self.access_token,
+            'instance_url': self.instance_url,
+            'expires_at': self.token_expires_at,
+        }
+        tmp_path = self.token_cache_path.with_suffix('.tmp')
+        # The token is a credential; keep the file private to the current user
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(cached, f)
+        os.replace(tmp_path, self.token_cache_path)
+
+    def authenticate(self, force=False):
+        """
+        Make sure a usable access token is available.
+
+        Args:
+            force: Discard the cached token and run the OAuth flow again
+        """
+        with self._auth_lock:
+            if not force and (self._token_valid() or self._load_cached_token()):
+                return self.access_token
+
+            payload = {
+                'grant_type': 'password',
+                'client_id': self.client_id,
+                'client_secret': self.client_secret,
+                'username': self.username,
+                'password': f"{self.password or ''}{self.security_token or ''}",
+            }
+            response = self.session.post(self.login_url, data=payload, timeout=self.timeout)
+            self.auth_count += 1
+            if response.status_code != 200:
+                raise SalesforceError(f"Authentication failed: {response.text[:200]}", response.status_code)
+
+            auth_response = response.json()
+            self.access_token = auth_response['access_token']
+            self.instance_url = auth_response['instance_url'].rstrip('/')
+            self.token_expires_at = time.time() + self.token_lifetime
+            self._save_cached_token()
+            return self.access_token
+
+    def url(self, path):
+        """Build an absolute URL from a path relative to the API version, or a server-relative path"""
+        if path.startswith('http://') or path.startswith('https://'):
+            return path
+        if not path.startswith('/services/'):
+            path = f"{self.base_path}/{path.lstrip('/')}"
+        return f"{self.instance_url}{path}"
+
+    def request(self, method, path, **kwargs):
+        """
+        Send an authenticated request and return the response.
+
+        A 401 invalidates the token; the request is retried once with a fresh one.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        headers = kwargs.pop('headers', {})
+        for attempt in range(2):
+            token = self.authenticate(force=attempt > 0)
+            response = self.session.request(
+                method, self.url(path), headers={**headers, 'Authorization': f'Bearer {token}'}, **kwargs
+            )
+            if response.status_code != 401:
+                break
+
+        if response.status_code >= 400:
+            try:
+                errors = response.json()
+            except ValueError:
+                errors = response.text
+            raise SalesforceError(f"{method} {path} failed with {response.status_code}: {str(errors)[:200]}",
+                                  response.status_code, errors)
+        return response
+
+    def get(self, path, **kwargs):
+        """GET a REST resource and return the decoded JSON body"""
+        return self.request('GET', path, **kwargs).json()
+
+    def _subrequest_url(self, path, relative=False):
+        """Turn a path relative to the API version into a composite subrequest URL"""
+        if path.startswith('/services/data/'):
+            path = path[len('/services/data/'):]
+        elif not re.match(r'^v\d+\.\d+/', path):
+            path = f"v{self.api_version}/{path.lstrip('/')}"
+        return path if relative else f"/services/data/{path}"
+
+    @staticmethod
+    def _subrequest_error(method, url, status_code, body):
+        return SalesforceError(f"{method} {url} failed with {status_code}: {str(body)[:200]}", status_code, body)
+
+    def composite_batch(self, subrequests, halt_on_error=False):
+        """
+        Run independent subrequests through Composite Batch, 25 per round trip.
+
+        Args:
+            subrequests: List of dicts with 'method', 'url' and optional 'richInput'
+            halt_on_error: Stop the remaining subrequests of a batch after a failure
+
+        Returns:
+            Results in input order: the decoded body, or a SalesforceError for
+            subrequests that failed
+        """
+        results = []
+        for start in range(0, len(subrequests), COMPOSITE_BATCH_MAX_SUBREQUESTS):
+            chunk = subrequests[start:start + COMPOSITE_BATCH_MAX_SUBREQUESTS]
+            batch = [{**subrequest, 'url': self._subrequest_url(subrequest['url'], relative=True)}
+                     for subrequest in chunk]
+            response = self.request('POST', 'composite/batch',
+                                    json={'batchRequests': batch, 'haltOnError': halt_on_error}).json()
+            for subrequest, result in zip(batch, response['results']):
+                if result['statusCode'] >= 400:
+                    results.append(self._subrequest_error(subrequest['method'], subrequest['url'],
+                                                          result['statusCode'], result['result']))
+                else:
+                    results.append(result['result'])
+        return results
+
+    def get_many(self, paths):
+        """GET many independent REST resources in as few round trips as possible"""
+        return self.composite_batch([{'method': 'GET', 'url': path} for path in paths])
+
+    @staticmethod
+    def _composite_groups(subrequests):
+        """
+        Split composite subrequests into groups of at most 25, of which at most 5
+        are query, queryAll or sObject Collections subrequests, keeping every
+        subrequest in the same group as the subrequests it references.
+        """
+        # Union subrequests connected through @{referenceId...} placeholders
+        owner = {}
+        parent = list(range(len(subrequests)))
+
+        def find(index):
+            while parent[index] != index:
+                parent[index] = parent[parent[index]]
+                index = parent[index]
+            return index
+
+        for index, subrequest in enumerate(subrequests):
+            text = json.dumps([subrequest['url'], subrequest.get('body')])
+            for reference in REFERENCE_PATTERN.findall(text):
+                if reference not in owner:
+                    raise ValueError(f"Subrequest {subrequest['referenceId']} references unknown {reference}")
+                parent[find(index)] = find(owner[reference])
+            owner[subrequest['referenceId']] = index
+
+        components = {}
+        for index in range(len(subrequests)):
+            components.setdefault(find(index), []).append(index)
+
+        def query_count(members):
+            return sum(1 for index in members if QUERY_SUBREQUEST_PATTERN.match(subrequests[index]['url']))
+
+        groups, current, current_queries = [], [], 0
+        for members in components.values():
+            queries = query_count(members)
+            if len(members) > COMPOSITE_MAX_SUBREQUESTS:
+                raise ValueError(f"{len(members)} dependent subrequests exceed the composite limit "
+                                 f"of {COMPOSITE_MAX_SUBREQUESTS}")
+            if queries > COMPOSITE_MAX_QUERY_SUBREQUESTS:
+                raise ValueError(f"{queries} dependent query or collection subrequests exceed the composite "
+                                 f"limit of {COMPOSITE_MAX_QUERY_SUBREQUESTS}")
+            if (len(current) + len(members) > COMPOSITE_MAX_SUBREQUESTS
+                    or current_queries + queries > COMPOSITE_MAX_QUERY_SUBREQUESTS):
+                groups.append(sorted(current))
+                current, current_queries = [], 0
+            current.extend(members)
+            current_queries += queries
+        if current:
+            groups.append(sorted(current))
+        return [[subrequests[index] for index in group] for group in groups]
+
+    def composite(self, subrequests, all_or_none=False):
+        """
+        Run subrequests that may depend on each other through the Composite resource.
+
+        Later subrequests can use values from earlier ones with
+        @{referenceId.field} placeholders. Subrequests are split into round trips
+        of at most 25 (at most 5 of them query, queryAll or sObject Collections),
+        never separating a subrequest from those it references. all_or_none
+        rollback only spans one round trip, so it requires a single group.
 
-# 1. Get OAuth2 token
-payload = {
-    'grant_type': 'password',
-    'client_id': CLIENT_ID,
-    'client_secret': CLIENT_SECRET,
-    'username': USERNAME,
-    'password': PASSWORD,
-}
+        Args:
+            subrequests: List of dicts with 'method', 'url', 'referenceId' and optional 'body'
+            all_or_none: Roll back every subrequest if one fails; raises ValueError
+                when the subrequests do not fit in one round trip
 
+        Returns:
+            Dict of referenceId to the decoded body, or a SalesforceError for
+            subrequests that failed
+        """
+        groups = self._composite_groups(subrequests)
+        if all_or_none and len(groups) > 1:
+            raise ValueError(f"all_or_none needs one composite round trip, but the subrequests "
+                             f"need {len(groups)}")
+        results = {}
+        for group in groups:
+            composite_request = [{**subrequest, 'url': self._subrequest_url(subrequest['url'])}
+                                 for subrequest in group]
+            response = self.request('POST', 'composite', json={
+                'allOrNone': all_or_none,
+                'compositeRequest': composite_request,
+            }).json()
+            urls = {subrequest['referenceId']: subrequest for subrequest in composite_request}
+            for result in response['compositeResponse']:
+                reference, status_code = result['referenceId'], result['httpStatusCode']
+                if status_code >= 400:
+                    subrequest = urls[reference]
+                    results[reference] = self._subrequest_error(subrequest['method'], subrequest['url'],
+                                                                status_code, result['body'])
+                else:
+                    results[reference] = result['body']
+        return results
 
+    def retrieve_records(self, sobject, ids, fields):
+        """
+        Retrieve records of one object by Id through sObject Collections, 2000 per round trip.
 
-response = requests.post(LOGIN_URL, data=payload)
-response.raise_for_status()
-auth_response = response.json()
+        Returns:
+            Dict of Id to record, with None for Ids that were not found
+        """
+        records = {}
+        for start in range(0, len(ids), COLLECTIONS_MAX_RETRIEVE):
+            chunk = list(ids[start:start + COLLECTIONS_MAX_RETRIEVE])
+            response = self.request('POST', f'composite/sobjects/{sobject}',
+                                    json={'ids': chunk, 'fields': list(fields)}).json()
+            records.update(zip(chunk, response))
+        return records
 
-access_token = auth_response['access_token']
-instance_url = auth_response['instance_url']
+    def close(self):
+        self.session.close()
 
-print("Access token:", access_token)
-print("Instance URL:", instance_url)
+    def __enter__(self):
+        return self
 
-# 2. Example: Query current user info via REST API
-headers = {
-    'Authorization': f'Bearer {access_token}'
-}
-api_url = f"{instance_url}/services/data/v58.0/chatter/users/me"  # v58.0 as example
+    def __exit__(self, *exc_info):
+        self.close()
 
-response = requests.get(api_url, headers=headers)
-response.raise_for_status()
-print(response.json())
-print(response.status_code)
 
-print(response.text)
-print(response.headers)
-print("completed")
+if __name__ == "__main__":
+    # Example: Query current user info via REST API
+    with SalesforceClient() as client:
+        user = client.get("chatter/users/me")
+        print("Instance URL:", client.instance_url)
+        print(user)
+        print("completed")
 
-# You can replace the API endpoint above with any Salesforce REST endpoint you need.
+    # You can replace the API endpoint above with any Salesforce REST endpoint you need.
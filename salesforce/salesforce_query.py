@@ -1 +1,351 @@
 
+import csv
+import io
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+from config.salesforce_connection import SalesforceClient, SalesforceError
+
+
+# Queries returning at most this many records stay on REST query/queryMore
+BULK_THRESHOLD = 10000
+# Records requested per Bulk API 2.0 result page
+BULK_PAGE_SIZE = 50000
+# Result pages downloaded ahead of the one being written
+BULK_MAX_CONCURRENCY = 4
+# Seconds between job status polls, growing up to the maximum
+POLL_INTERVAL = 0.5
+MAX_POLL_INTERVAL = 10.0
+JOB_TIMEOUT = 3600
+
+# CSV parsing keeps every column as a nullable string so pages share one schema
+CSV_CONVERT_OPTIONS = dict(strings_can_be_null=True, null_values=[''], quoted_strings_can_be_null=True)
+# Text fields (descriptions, addresses) may contain quoted line breaks
+CSV_PARSE_OPTIONS = dict(newlines_in_values=True)
+
+# REST JSON datetimes end in +0000 where Bulk API CSV results end in Z
+REST_DATETIME_PATTERN = re.compile(r'^(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d+)?)\+0000$')
+
+SELECT_PATTERN = re.compile(r'^\s*SELECT\s+(?P<fields>.+?)\s+FROM\s', re.IGNORECASE | re.DOTALL)
+FIELD_PATTERN = re.compile(r'^\w+(?:\.\w+)*$')
+# FROM and WHERE of a plain query, with ORDER BY dropped and any LIMIT kept
+COUNT_PATTERN = re.compile(r'^\s*SELECT\s+.+?\s+(?P<source>FROM\s.+?)(?:\s+ORDER\s+BY\s.+?)?'
+                           r'(?P<limit>\s+LIMIT\s+\d+)?\s*$', re.IGNORECASE | re.DOTALL)
+
+
+def soql_columns(soql):
+    """Return the field names of a SOQL select list, or None if it holds anything but plain fields"""
+    match = SELECT_PATTERN.match(soql)
+    if not match:
+        return None
+    fields = [field.strip() for field in match.group('fields').split(',')]
+    if not all(FIELD_PATTERN.match(field) for field in fields):
+        return None
+    return fields
+
+
+def count_query(soql):
+    """Return SELECT COUNT() over the same FROM and WHERE as soql, or None when it cannot be built"""
+    if soql_columns(soql) is None or re.search(r'\b(?:GROUP\s+BY|OFFSET)\b', soql, re.IGNORECASE):
+        return None
+    match = COUNT_PATTERN.match(soql)
+    if not match:
+        return None
+    return f"SELECT COUNT() {match.group('source')}{match.group('limit') or ''}"
+
+
+def resolve_columns(columns, records):
+    """
+    Match select-list columns to the spelling used by the returned records.
+
+    Null relationships are absent from flattened records, so the select list
+    is what keeps their fields (Account.Name) as columns. Without a select list
+    the union of the records' keys is used.
+    """
+    seen = {}
+    for record in records:
+        for key in record:
+            seen.setdefault(key.lower(), key)
+    if columns is None:
+        return list(seen.values())
+    return [seen.get(column.lower(), column) for column in columns]
+
+
+def rest_value(value):
+    """Render a REST JSON value the way Bulk API CSV results render it"""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, str):
+        return REST_DATETIME_PATTERN.sub(r'\1Z', value)
+    return str(value)
+
+
+def flatten_record(record, prefix=''):
+    """Flatten a REST record, naming relationship fields like the Bulk API (Account.Name)"""
+    flat = {}
+    for key, value in record.items():
+        if key == 'attributes':
+            continue
+        if isinstance(value, dict):
+            flat.update(flatten_record(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = rest_value(value)
+    return flat
+
+
+def records_to_batch(records, columns):
+    """Build a string RecordBatch from flattened records in a fixed column order"""
+    return pa.record_batch(
+        [pa.array([record.get(column) for record in records], type=pa.string()) for column in columns],
+        names=columns,
+    )
+
+
+def rest_query_pages(client, soql, include_deleted=False, first_page=None):
+    """
+    Yield lists of flattened records from REST query/queryMore pagination.
+
+    Args:
+        client: SalesforceClient
+        soql: SOQL query
+        include_deleted: Use queryAll so deleted and archived records are included
+        first_page: Already fetched first response, to continue from
+    """
+    page = first_page or client.get('queryAll' if include_deleted else 'query', params={'q': soql})
+    while True:
+        yield [flatten_record(record) for record in page['records']]
+        if page.get('done', True) or not page.get('nextRecordsUrl'):
+            return
+        page = client.get(page['nextRecordsUrl'])
+
+
+def create_bulk_job(client, soql, include_deleted=False):
+    """Create a Bulk API 2.0 query job and return its id"""
+    job = client.request('POST', 'jobs/query', json={
+        'operation': 'queryAll' if include_deleted else 'query',
+        'query': soql,
+        'contentType': 'CSV',
+        'columnDelimiter': 'COMMA',
+        'lineEnding': 'LF',
+    }).json()
+    return job['id']
+
+
+def wait_for_job(client, job_id, poll_interval=None, timeout=JOB_TIMEOUT):
+    """Poll a query job until it completes, backing off between polls"""
+    poll_interval = poll_interval or POLL_INTERVAL
+    deadline = time.monotonic() + timeout
+    while True:
+        job = client.get(f'jobs/query/{job_id}')
+        state = job.get('state')
+        if state == 'JobComplete':
+            return job
+        if state in ('Failed', 'Aborted'):
+            raise SalesforceError(f"Bulk query job {job_id} {state.lower()}: {job.get('errorMessage')}")
+        if time.monotonic() > deadline:
+            raise SalesforceError(f"Bulk query job {job_id} did not complete within {timeout} seconds")
+        time.sleep(poll_interval)
+        poll_interval = min(poll_interval * 2, MAX_POLL_INTERVAL)
+
+
+def bulk_result_pages(client, job_id, page_size=BULK_PAGE_SIZE, max_concurrency=BULK_MAX_CONCURRENCY):
+    """
+    Yield the CSV result pages of a completed query job, in order.
+
+    Each page's Sforce-Locator header names the next page, so the next
+    download starts as soon as the current page's headers arrive, while its
+    body is still being read. At most max_concurrency pages are downloaded or
+    waiting to be consumed at any time, which bounds memory use.
+    """
+    def fetch(locator, next_locator):
+        try:
+            params = {'maxRecords': page_size}
+            if locator:
+                params['locator'] = locator
+            response = client.request('GET', f'jobs/query/{job_id}/results', params=params, stream=True)
+            header = response.headers.get('Sforce-Locator')
+            next_locator.set_result(None if header in (None, '', 'null') else header)
+        except BaseException as e:
+            next_locator.set_exception(e)
+            raise
+        return response.content
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        in_flight = deque()
+
+        def submit(locator):
+            next_locator = Future()
+            in_flight.append(executor.submit(fetch, locator, next_locator))
+            return next_locator
+
+        newest = submit(None)
+        chain_done = False
+        while True:
+            while not chain_done and len(in_flight) < max_concurrency:
+                locator = newest.result()
+                if locator is None:
+                    chain_done = True
+                else:
+                    newest = submit(locator)
+            if not in_flight:
+                return
+            yield in_flight.popleft().result()
+
+
+def csv_page_batches(content):
+    """Stream RecordBatches out of one CSV result page"""
+    if not content.strip():
+        return
+    header = content.split(b'\n', 1)[0].decode('utf-8').rstrip('\r')
+    columns = next(csv.reader([header]))
+    convert_options = pacsv.ConvertOptions(column_types={column: pa.string() for column in columns},
+                                           **CSV_CONVERT_OPTIONS)
+    reader = pacsv.open_csv(io.BytesIO(content), parse_options=pacsv.ParseOptions(**CSV_PARSE_OPTIONS),
+                            convert_options=convert_options)
+    for batch in reader:
+        yield batch
+
+
+class ParquetSink:
+    """
+    Parquet writer opened lazily with the schema of the first batch.
+
+    Batches go to a temporary file that only replaces path when close() is
+    called; abort() discards it, so a failed query never leaves a partial file.
+
+    Args:
+        path: Output Parquet file
+        columns: Column names written as a zero-row string schema when no batch arrives
+    """
+    def __init__(self, path, columns=None):
+        self.path = str(path)
+        self.tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        self.columns = columns
+        self.writer = None
+        self.schema = None
+        self.rows = 0
+
+    def write(self, batch):
+        if self.writer is None:
+            self.schema = batch.schema
+            self.writer = pq.ParquetWriter(self.tmp_path, self.schema)
+        elif batch.schema != self.schema:
+            # Later pages may omit null-only relationship columns; align to the first page
+            batch = pa.record_batch(
+                [batch.column(name) if name in batch.schema.names else pa.nulls(batch.num_rows, pa.string())
+                 for name in self.schema.names],
+                schema=self.schema,
+            )
+        if batch.num_rows:
+            self.writer.write_batch(batch)
+            self.rows += batch.num_rows
+
+    def close(self):
+        if self.writer is None:
+            schema = pa.schema([(column, pa.string()) for column in self.columns or []])
+            pq.write_table(schema.empty_table(), self.tmp_path)
+        else:
+            self.writer.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        if self.writer is not None:
+            self.writer.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+def query_to_parquet(client, soql, path, include_deleted=False, bulk_threshold=BULK_THRESHOLD,
+                     page_size=BULK_PAGE_SIZE, max_concurrency=BULK_MAX_CONCURRENCY, force_bulk=False):
+    """
+    Run a SOQL query and write the result straight to a Parquet file.
+
+    The result size is first probed with a REST SELECT COUNT() over the same
+    FROM and WHERE (or the query itself when no count can be derived); if it is
+    within bulk_threshold the REST pages are written directly. Larger results
+    switch to a Bulk API 2.0
+    query job whose CSV pages are downloaded concurrently and streamed into the
+    file page by page. All columns are written as nullable strings, named after
+    the select list, and an empty result still gets those columns. The file
+    only appears once the whole result has been written.
+
+    Args:
+        client: SalesforceClient
+        soql: SOQL query
+        path: Output Parquet file
+        include_deleted: Include deleted and archived records (queryAll)
+        bulk_threshold: Largest result kept on REST pagination
+        page_size: Records per Bulk API result page
+        max_concurrency: Bulk API result pages downloaded ahead
+        force_bulk: Skip the REST probe and always use the Bulk API
+
+    Returns:
+        Dict with the path used ('rest' or 'bulk') and the number of rows written
+    """
+    columns = soql_columns(soql)
+    sink = ParquetSink(path, columns)
+    try:
+        resource = 'queryAll' if include_deleted else 'query'
+        first_page, total = None, None
+        if not force_bulk:
+            probe = count_query(soql)
+            if probe is not None:
+                total = client.get(resource, params={'q': probe})['totalSize']
+            else:
+                first_page = client.get(resource, params={'q': soql})
+                total = first_page['totalSize']
+
+        if total is not None and total <= bulk_threshold:
+            mode = 'rest'
+            resolved = None
+            for records in rest_query_pages(client, soql, include_deleted, first_page):
+                if records and resolved is None:
+                    resolved = resolve_columns(columns, records)
+                if records:
+                    sink.write(records_to_batch(records, resolved))
+        else:
+            mode = 'bulk'
+            job_id = create_bulk_job(client, soql, include_deleted)
+            wait_for_job(client, job_id)
+            for content in bulk_result_pages(client, job_id, page_size, max_concurrency):
+                for batch in csv_page_batches(content):
+                    sink.write(batch)
+    except BaseException:
+        sink.abort()
+        raise
+    sink.close()
+    return {'mode': mode, 'rows': sink.rows}
+
+
+def main():
+    """Command line entry point: run one SOQL query into a Parquet file"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Extract a SOQL query to Parquet')
+    parser.add_argument('soql', help='SOQL query to run')
+    parser.add_argument('output', help='Output Parquet file')
+    parser.add_argument('--include-deleted', action='store_true',
+                       help='Include deleted and archived records (queryAll)')
+    parser.add_argument('--bulk', action='store_true',
+                       help='Always use the Bulk API 2.0')
+    parser.add_argument('--bulk-threshold', type=int, default=BULK_THRESHOLD,
+                       help=f'Largest result kept on REST pagination (default: {BULK_THRESHOLD})')
+    args = parser.parse_args()
+
+    with SalesforceClient() as client:
+        result = query_to_parquet(client, args.soql, args.output, include_deleted=args.include_deleted,
+                                  bulk_threshold=args.bulk_threshold, force_bulk=args.bulk)
+    print(f"Wrote {result['rows']} rows to {args.output} using the {result['mode']} API")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from config.salesforce_connection import SalesforceClient, SalesforceError
+from salesforce_query import query_to_parquet, rest_query_pages
+
+
+# Local columnar copies and their watermarks
+DATA_DIR = Path(os.getenv('SALESFORCE_DATA_DIR', Path(__file__).parent / 'data'))
+WATERMARK_FIELD = 'SystemModstamp'
+# getDeleted only covers roughly the last 15 days; older windows fall back to queryAll
+GET_DELETED_MAX_DAYS = 15
+# SystemModstamp is stamped before commit, so a transaction committing after a run can
+# carry an earlier stamp; each run re-reads this window before its watermarks
+LOOKBACK = timedelta(minutes=int(os.getenv('SALESFORCE_SYNC_LOOKBACK_MINUTES', 5)))
+# Watermark for objects that were empty when first extracted
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def parse_salesforce_datetime(value):
+    """Parse Salesforce datetimes such as 2024-01-15T18:20:41.000+0000"""
+    value = value.replace('Z', '+00:00')
+    if len(value) > 5 and value[-5] in '+-' and value[-3] != ':':
+        value = f"{value[:-2]}:{value[-2:]}"
+    return datetime.fromisoformat(value).astimezone(timezone.utc)
+
+
+def soql_datetime(value):
+    """Format a datetime as a SOQL datetime literal (second precision, UTC)"""
+    return value.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+class ObjectSync:
+    """
+    Incremental sync of Salesforce objects into local Parquet copies.
+
+    The first run of an object extracts it in full. Later runs only fetch
+    records whose SystemModstamp is at or after the stored watermark, plus the
+    Ids deleted since the deletion watermark, and merge both into the local copy by Id:
+    - {data_dir}/{sobject}.parquet: the local copy
+    - {data_dir}/_watermarks.json: per-object SystemModstamp watermark, and the
+      separate point up to which deletions have been fetched
+    API calls and rows transferred therefore scale with the change volume.
+    Both windows start lookback before their watermark, so late commits are
+    not skipped; records fetched twice are absorbed by the merge.
+    """
+    def __init__(self, client, data_dir=DATA_DIR, lookback=LOOKBACK):
+        self.client = client
+        self.lookback = lookback
+        self.data_dir = Path(data_dir)
+        self.watermarks_path = self.data_dir / '_watermarks.json'
+
+    def load_watermarks(self):
+        if not self.watermarks_path.exists():
+            return {}
+        with open(self.watermarks_path) as f:
+            return json.load(f)
+
+    def save_watermarks(self, watermarks):
+        tmp_path = self.watermarks_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(watermarks, f, indent=4, sort_keys=True)
+        os.replace(tmp_path, self.watermarks_path)
+
+    def table_path(self, sobject):
+        return self.data_dir / f"{sobject}.parquet"
+
+    @staticmethod
+    def max_modstamp(table, default=None):
+        """Return the latest SystemModstamp in a table, or default when it is empty"""
+        if not table.num_rows or WATERMARK_FIELD not in table.column_names:
+            return default
+        latest = pc.max(table.column(WATERMARK_FIELD)).as_py()
+        return parse_salesforce_datetime(latest) if latest else default
+
+    def fetch_deleted_ids(self, sobject, since, until):
+        """
+        Return the Ids of records deleted between since and until.
+
+        Uses the getDeleted resource when the window is within its retention,
+        otherwise (or if the object does not support it) queryAll on IsDeleted.
+
+        Returns:
+            (set of deleted Ids, time up to which the set is complete). getDeleted
+            may report a latestDateCovered before until; deletions after it are
+            fetched again on the next run.
+        """
+        if until - since < timedelta(days=GET_DELETED_MAX_DAYS):
+            try:
+                result = self.client.get(f'sobjects/{sobject}/deleted/', params={
+                    'start': since.isoformat(timespec='seconds'),
+                    'end': until.isoformat(timespec='seconds'),
+                })
+                earliest = result.get('earliestDateAvailable')
+                if not earliest or parse_salesforce_datetime(earliest) <= since:
+                    latest = result.get('latestDateCovered')
+                    covered = min(parse_salesforce_datetime(latest), until) if latest else until
+                    return {record['id'] for record in result.get('deletedRecords', [])}, max(covered, since)
+            except SalesforceError as e:
+                if e.status_code not in (400, 404):
+                    raise
+
+        soql = (f"SELECT Id FROM {sobject} WHERE IsDeleted = true "
+                f"AND {WATERMARK_FIELD} >= {soql_datetime(since)}")
+        deleted_ids = {record['Id'] for page in rest_query_pages(self.client, soql, include_deleted=True)
+                       for record in page}
+        return deleted_ids, until
+
+    def merge(self, sobject, changes, deleted_ids):
+        """Replace records in the local copy by Id and drop deleted ones"""
+        path = self.table_path(sobject)
+        local = pq.read_table(path)
+        changed_ids = changes.column('Id').to_pylist() if changes.num_rows else []
+        replaced = pa.array(list(deleted_ids) + changed_ids, type=pa.string())
+        if len(replaced) and local.num_rows:
+            local = local.filter(pc.invert(pc.is_in(local.column('Id'), value_set=replaced)))
+        if changes.num_rows:
+            local = pa.concat_tables([local, changes], promote_options='default')
+
+        tmp_path = path.with_suffix('.parquet.tmp')
+        pq.write_table(local, tmp_path)
+        os.replace(tmp_path, path)
+        return local.num_rows
+
+    def sync(self, sobject, fields, full=False):
+        """
+        Bring the local copy of an object up to date.
+
+        Args:
+            sobject: Object API name, e.g. Account
+            fields: Fields to keep; Id and SystemModstamp are always included
+            full: Ignore the watermark and re-extract the whole object
+
+        Returns:
+            Dict with the sync mode, changed and deleted counts and local row count
+        """
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        fields = ['Id', WATERMARK_FIELD] + [field for field in fields if field not in ('Id', WATERMARK_FIELD)]
+        watermarks = self.load_watermarks()
+        state = watermarks.get(sobject)
+        started_at = datetime.now(timezone.utc)
+        select = f"SELECT {', '.join(fields)} FROM {sobject}"
+
+        if full or state is None or state.get('fields') != fields or not self.table_path(sobject).exists():
+            # query_to_parquet only replaces the local copy once the whole extract is written
+            result = query_to_parquet(self.client, select, self.table_path(sobject))
+            watermark = self.max_modstamp(pq.read_table(self.table_path(sobject), columns=[WATERMARK_FIELD]),
+                                          default=EPOCH)
+            deleted_watermark = watermark
+            mode, changed, deleted, rows = 'full', result['rows'], 0, result['rows']
+        else:
+            since = parse_salesforce_datetime(state['watermark'])
+            deleted_since = parse_salesforce_datetime(state.get('deleted_watermark', state['watermark']))
+            changes_path = self.data_dir / f"{sobject}.changes.parquet"
+            try:
+                # The lookback re-reads records seen last run; merging by Id absorbs them
+                query_to_parquet(self.client,
+                                 f"{select} WHERE {WATERMARK_FIELD} >= {soql_datetime(since - self.lookback)}",
+                                 changes_path)
+                changes = pq.read_table(changes_path)
+            finally:
+                if changes_path.exists():
+                    changes_path.unlink()
+            deleted_ids, covered = self.fetch_deleted_ids(sobject, deleted_since - self.lookback, started_at)
+            rows = self.merge(sobject, changes, deleted_ids)
+            # Records re-read inside the lookback must not move either watermark back
+            watermark = max(self.max_modstamp(changes, default=since), since)
+            deleted_watermark = max(covered, deleted_since)
+            mode, changed, deleted = 'incremental', changes.num_rows, len(deleted_ids)
+
+        # The watermark is the server-side SystemModstamp, so client clock skew cannot skip records
+        watermarks[sobject] = {
+            'watermark': watermark.isoformat(timespec='seconds'),
+            'deleted_watermark': deleted_watermark.isoformat(timespec='seconds'),
+            'fields': fields,
+            'last_sync': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        }
+        self.save_watermarks(watermarks)
+        return {'mode': mode, 'changed': changed, 'deleted': deleted, 'rows': rows}
+
+
+def main():
+    """Command line entry point: incrementally sync one object"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Incrementally sync a Salesforce object to Parquet')
+    parser.add_argument('sobject', help='Object API name, e.g. Account')
+    parser.add_argument('fields', nargs='+', help='Fields to sync')
+    parser.add_argument('--data-dir', default=str(DATA_DIR), help='Directory for local copies')
+    parser.add_argument('--full', action='store_true', help='Re-extract the whole object')
+    parser.add_argument('--lookback-minutes', type=float, default=LOOKBACK.total_seconds() / 60,
+                        help='Minutes re-read before each watermark to catch late commits '
+                             f'(default: {LOOKBACK.total_seconds() / 60:g})')
+    args = parser.parse_args()
+
+    with SalesforceClient() as client:
+        result = ObjectSync(client, args.data_dir, timedelta(minutes=args.lookback_minutes)).sync(args.sobject, args.fields, full=args.full)
+    print(f"{args.sobject}: {result['mode']} sync, {result['changed']} changed, "
+          f"{result['deleted']} deleted, {result['rows']} rows")
+
+
+if __name__ == "__main__":
+    main()
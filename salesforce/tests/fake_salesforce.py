@@ -0,0 +1,457 @@
+import csv
+import io
+import itertools
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+SOQL_PATTERN = re.compile(
+    r'^\s*SELECT\s+(?P<fields>.+?)\s+FROM\s+(?P<sobject>\w+)'
+    r'(?:\s+WHERE\s+(?P<where>.+?))?(?:\s+ORDER\s+BY\s+(?P<order>\w+))?(?:\s+LIMIT\s+(?P<limit>\d+))?\s*$',
+    re.IGNORECASE | re.DOTALL,
+)
+CONDITION_PATTERN = re.compile(r"^\s*(?P<field>[\w.]+)\s*(?P<op>!=|>=|<=|=|>|<)\s*(?P<value>'[^']*'|\S+)\s*$")
+OPERATORS = {
+    '=': lambda a, b: a == b,
+    '!=': lambda a, b: a != b,
+    '>': lambda a, b: a is not None and a > b,
+    '>=': lambda a, b: a is not None and a >= b,
+    '<': lambda a, b: a is not None and a < b,
+    '<=': lambda a, b: a is not None and a <= b,
+}
+
+
+def parse_literal(value):
+    if value.startswith("'"):
+        return value[1:-1]
+    lowered = value.lower()
+    if lowered in ('true', 'false'):
+        return lowered == 'true'
+    if lowered == 'null':
+        return None
+    try:
+        return float(value) if '.' in value and 'T' not in value else int(value)
+    except ValueError:
+        # Datetime literals compare as ISO 8601 strings
+        return value
+
+
+def normalize_datetime(value):
+    """Bring Salesforce datetime strings to one comparable form"""
+    if isinstance(value, str) and re.match(r'^\d{4}-\d{2}-\d{2}T', value):
+        return value.replace('Z', '+0000')[:19]
+    return value
+
+
+def run_soql(records, soql):
+    """
+    Evaluate a small SOQL subset: a field list or COUNT(), one object, an AND-ed
+    WHERE clause of simple comparisons, ORDER BY one field and LIMIT.
+
+    Returns:
+        (field names, matching records projected onto those fields)
+    """
+    match = SOQL_PATTERN.match(soql)
+    if not match:
+        raise ValueError(f"Unsupported SOQL: {soql}")
+    fields = [field.strip() for field in match.group('fields').split(',')]
+    rows = list(records.get(match.group('sobject'), {}).values())
+
+    if match.group('where'):
+        for condition in re.split(r'\s+AND\s+', match.group('where'), flags=re.IGNORECASE):
+            parsed = CONDITION_PATTERN.match(condition)
+            if not parsed:
+                raise ValueError(f"Unsupported condition: {condition}")
+            compare = OPERATORS[parsed.group('op')]
+            expected = normalize_datetime(parse_literal(parsed.group('value')))
+            rows = [row for row in rows
+                    if compare(normalize_datetime(row.get(parsed.group('field'))), expected)]
+    if match.group('order'):
+        rows.sort(key=lambda row: (row.get(match.group('order')) is None, row.get(match.group('order'))))
+    if match.group('limit'):
+        rows = rows[:int(match.group('limit'))]
+    return fields, [{field: row.get(field) for field in fields} for row in rows]
+
+
+def rest_record(row):
+    """Nest relationship fields (Account.Name) the way REST query returns them, a null lookup as None"""
+    record = {'attributes': {'type': 'sObject'}}
+    relationships = {}
+    for field, value in row.items():
+        if '.' in field:
+            relationship, name = field.split('.', 1)
+            relationships.setdefault(relationship, {})[name] = value
+        else:
+            record[field] = value
+    for relationship, values in relationships.items():
+        if any(value is not None for value in values.values()):
+            record[relationship] = {'attributes': {'type': relationship}, **values}
+        else:
+            record[relationship] = None
+    return record
+
+
+def resolve_reference(expression, results):
+    """Resolve a composite reference such as NewAccount.id or Lookup.records[0].Id"""
+    value = results
+    for name, index in re.findall(r'(\w+)|\[(\d+)\]', expression):
+        value = value[int(index)] if index else value[name]
+    return value
+
+
+def csv_value(value):
+    """Render a value as Bulk API CSV does, with datetimes in UTC ending in Z"""
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, str) and re.match(r'^\d{4}-\d{2}-\d{2}T.*\+0000$', value):
+        return value[:-5] + 'Z'
+    return str(value)
+
+
+class FakeSalesforceServer:
+    """
+    Local stand-in for the Salesforce OAuth, REST (including getDeleted),
+    Composite, Composite Batch, sObject Collections and Bulk API 2.0 query endpoints.
+
+    SOQL is evaluated by run_soql, which covers the subset the client code issues.
+
+    Args:
+        username: Username accepted by the password grant
+        password: Password (including any security token) accepted by the password grant
+        latency: Seconds to wait before answering each request
+        rest_batch_size: Records per REST query page
+        bulk_polls: Status polls answered InProgress before a Bulk query job completes
+    """
+    API_PREFIX = r'/services/data/v[\d.]+'
+
+    def __init__(self, username='user@example.com', password='secret', latency=0.0,
+                 rest_batch_size=2000, bulk_polls=1):
+        self.username = username
+        self.password = password
+        self.latency = latency
+        self.rest_batch_size = rest_batch_size
+        self.bulk_polls = bulk_polls
+        self.records = {}  # {sobject: {Id: record}}
+        self.cursors = {}  # REST query cursors: {cursor id: records}
+        self.jobs = {}  # Bulk API 2.0 query jobs
+        self.get_deleted_earliest = None  # earliestDateAvailable reported by getDeleted
+        self.get_deleted_latest = None  # latestDateCovered reported by getDeleted; later deletions are withheld
+        self.valid_tokens = set()
+        self.auth_count = 0
+        self.request_log = []  # (method, path) for every API request
+        self._token_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._server = None
+        self.base_url = None
+        self.routes = [
+            ('POST', re.compile(r'^/services/oauth2/token$'), self.handle_token),
+            ('GET', re.compile(self.API_PREFIX + r'/chatter/users/me$'), self.handle_current_user),
+            ('GET', re.compile(self.API_PREFIX + r'/sobjects/(?P<sobject>\w+)/(?P<record_id>\w+)$'),
+             self.handle_get_record),
+            ('GET', re.compile(self.API_PREFIX + r'/sobjects/(?P<sobject>\w+)/deleted/?$'), self.handle_get_deleted),
+            ('GET', re.compile(self.API_PREFIX + r'/(?P<resource>query|queryAll)$'), self.handle_query),
+            ('GET', re.compile(self.API_PREFIX + r'/query/(?P<cursor>\d+)-(?P<offset>\d+)$'), self.handle_query_more),
+            ('POST', re.compile(self.API_PREFIX + r'/composite/batch$'), self.handle_composite_batch),
+            ('POST', re.compile(self.API_PREFIX + r'/composite$'), self.handle_composite),
+            ('POST', re.compile(self.API_PREFIX + r'/composite/sobjects/(?P<sobject>\w+)$'),
+             self.handle_collection_retrieve),
+            ('POST', re.compile(self.API_PREFIX + r'/jobs/query$'), self.handle_create_job),
+            ('GET', re.compile(self.API_PREFIX + r'/jobs/query/(?P<job_id>\w+)$'), self.handle_job_status),
+            ('GET', re.compile(self.API_PREFIX + r'/jobs/query/(?P<job_id>\w+)/results$'), self.handle_job_results),
+        ]
+
+    @property
+    def login_url(self):
+        return f"{self.base_url}/services/oauth2/token"
+
+    def add_records(self, sobject, records):
+        """Store records (dicts with an Id) for an sObject"""
+        with self._lock:
+            table = self.records.setdefault(sobject, {})
+            for record in records:
+                table[record['Id']] = dict(record)
+
+    def expire_tokens(self):
+        """Invalidate every issued access token, as a session timeout would"""
+        with self._lock:
+            self.valid_tokens.clear()
+
+    def api_requests(self, method=None):
+        """Return logged API requests, excluding OAuth calls"""
+        return [(m, p) for m, p in self.request_log
+                if not p.startswith('/services/oauth2') and (method is None or m == method)]
+
+    # Handlers return (status, payload), optionally followed by a content type and extra headers
+
+    def handle_token(self, request):
+        form = {key: values[0] for key, values in parse_qs(request['body'].decode()).items()}
+        if (form.get('grant_type') != 'password' or form.get('username') != self.username
+                or form.get('password') != self.password):
+            return 400, {'error': 'invalid_grant', 'error_description': 'authentication failure'}
+        token = f"token-{next(self._token_ids)}"
+        with self._lock:
+            self.valid_tokens.add(token)
+            self.auth_count += 1
+        return 200, {
+            'access_token': token,
+            'instance_url': self.base_url,
+            'id': f"{self.base_url}/id/00D000000000001/005000000000001",
+            'token_type': 'Bearer',
+            'issued_at': str(int(time.time() * 1000)),
+        }
+
+    def handle_current_user(self, request):
+        return 200, {'id': '005000000000001', 'username': self.username, 'displayName': 'Fake User'}
+
+    def handle_get_record(self, request, sobject, record_id):
+        record = self.records.get(sobject, {}).get(record_id)
+        if record is None:
+            return 404, [{'errorCode': 'NOT_FOUND', 'message': 'The requested resource does not exist'}]
+        return 200, {'attributes': {'type': sobject}, **record}
+
+    def delete_records(self, sobject, record_ids, deleted_at):
+        """Soft-delete records, as the recycle bin does"""
+        with self._lock:
+            for record_id in record_ids:
+                record = self.records[sobject][record_id]
+                record.update({'IsDeleted': True, 'SystemModstamp': deleted_at})
+
+    def handle_get_deleted(self, request, sobject):
+        start = normalize_datetime(request['query'].get('start'))
+        end = normalize_datetime(request['query'].get('end'))
+        if not start or not end:
+            return 400, [{'errorCode': 'MISSING_ARGUMENT', 'message': 'start and end are required'}]
+        earliest = self.get_deleted_earliest or '1970-01-01T00:00:00.000+0000'
+        latest = request['query'].get('end')
+        if self.get_deleted_latest and normalize_datetime(self.get_deleted_latest) < end:
+            latest = self.get_deleted_latest
+        deleted = [
+            {'id': record['Id'], 'deletedDate': record['SystemModstamp']}
+            for record in self.records.get(sobject, {}).values()
+            if record.get('IsDeleted')
+            and start <= normalize_datetime(record['SystemModstamp']) <= normalize_datetime(latest)
+        ]
+        return 200, {'deletedRecords': deleted, 'earliestDateAvailable': earliest, 'latestDateCovered': latest}
+
+    def _subrequest(self, request, method, url, body=None):
+        """Run a composite subrequest through the normal routes, without logging it"""
+        if not url.startswith('/'):
+            url = f"/services/data/{url}"
+        data = json.dumps(body).encode('utf-8') if body is not None else b''
+        result = self.dispatch(method, url, request['headers'], data, log=False)
+        return result[0], result[1]
+
+    def handle_composite_batch(self, request):
+        batch_requests = json.loads(request['body'])['batchRequests']
+        if len(batch_requests) > 25:
+            return 400, [{'errorCode': 'INVALID_BATCH_REQUEST', 'message': 'Limit is 25 subrequests'}]
+        results = []
+        for subrequest in batch_requests:
+            status, body = self._subrequest(request, subrequest['method'], subrequest['url'],
+                                            subrequest.get('richInput'))
+            results.append({'statusCode': status, 'result': body})
+        return 200, {'hasErrors': any(result['statusCode'] >= 400 for result in results), 'results': results}
+
+    def handle_composite(self, request):
+        composite_request = json.loads(request['body'])['compositeRequest']
+        if len(composite_request) > 25:
+            return 400, [{'errorCode': 'INVALID_COMPOSITE_REQUEST', 'message': 'Limit is 25 subrequests'}]
+        queries = [subrequest for subrequest in composite_request
+                   if re.search(r'/(?:query|queryAll|composite/sobjects)(?:[/?]|$)', subrequest['url'])]
+        if len(queries) > 5:
+            return 400, [{'errorCode': 'INVALID_COMPOSITE_REQUEST',
+                          'message': 'Limit is 5 query and sObject Collections subrequests'}]
+        bodies, failed, responses = {}, set(), []
+        for subrequest in composite_request:
+            text = json.dumps([subrequest['url'], subrequest.get('body')])
+            references = re.findall(r'@\{([^}]+)\}', text)
+            if any(reference.split('.')[0].split('[')[0] in failed for reference in references):
+                status, body = 400, [{'errorCode': 'PROCESSING_HALTED',
+                                      'message': 'Invalid reference specified. No value for ' + references[0]}]
+            else:
+                for reference in references:
+                    text = text.replace('@{' + reference + '}', str(resolve_reference(reference, bodies)))
+                url, body = json.loads(text)
+                status, body = self._subrequest(request, subrequest['method'], url, body)
+            if status >= 400:
+                failed.add(subrequest['referenceId'])
+            bodies[subrequest['referenceId']] = body
+            responses.append({'body': body, 'httpHeaders': {}, 'httpStatusCode': status,
+                              'referenceId': subrequest['referenceId']})
+        return 200, {'compositeResponse': responses}
+
+    def handle_collection_retrieve(self, request, sobject):
+        body = json.loads(request['body'])
+        if len(body['ids']) > 2000:
+            return 400, [{'errorCode': 'EXCEEDED_ID_LIMIT', 'message': 'Limit is 2000 ids'}]
+        table = self.records.get(sobject, {})
+        return 200, [
+            {'attributes': {'type': sobject}, 'Id': record_id,
+             **{field: table[record_id].get(field) for field in body['fields'] if field != 'Id'}}
+            if record_id in table else None
+            for record_id in body['ids']
+        ]
+
+    def visible_records(self, include_deleted=False):
+        """Return the record store, dropping deleted records unless include_deleted"""
+        with self._lock:
+            return {
+                sobject: {record_id: record for record_id, record in table.items()
+                          if include_deleted or not record.get('IsDeleted')}
+                for sobject, table in self.records.items()
+            }
+
+    def _query_page(self, cursor, rows, offset):
+        page = rows[offset:offset + self.rest_batch_size]
+        done = offset + len(page) >= len(rows)
+        payload = {
+            'totalSize': len(rows),
+            'done': done,
+            'records': [rest_record(row) for row in page],
+        }
+        if not done:
+            payload['nextRecordsUrl'] = f"/services/data/v58.0/query/{cursor}-{offset + len(page)}"
+        return 200, payload
+
+    def handle_query(self, request, resource):
+        try:
+            fields, rows = run_soql(self.visible_records(resource == 'queryAll'), request['query'].get('q', ''))
+        except ValueError as e:
+            return 400, [{'errorCode': 'MALFORMED_QUERY', 'message': str(e)}]
+        if [field.upper() for field in fields] == ['COUNT()']:
+            return 200, {'totalSize': len(rows), 'done': True, 'records': []}
+        with self._lock:
+            cursor = str(len(self.cursors) + 1)
+            self.cursors[cursor] = rows
+        return self._query_page(cursor, rows, 0)
+
+    def handle_query_more(self, request, cursor, offset):
+        rows = self.cursors.get(cursor)
+        if rows is None:
+            return 400, [{'errorCode': 'INVALID_QUERY_LOCATOR', 'message': 'invalid query locator'}]
+        return self._query_page(cursor, rows, int(offset))
+
+    def handle_create_job(self, request):
+        body = json.loads(request['body'] or b'{}')
+        try:
+            fields, rows = run_soql(self.visible_records(body.get('operation') == 'queryAll'), body.get('query', ''))
+        except ValueError as e:
+            return 400, [{'errorCode': 'INVALIDJOB', 'message': str(e)}]
+        with self._lock:
+            job_id = f"750{len(self.jobs) + 1:015d}"
+            self.jobs[job_id] = {'fields': fields, 'rows': rows, 'polls': 0, 'operation': body.get('operation')}
+        return 200, {'id': job_id, 'operation': body.get('operation'), 'object': 'sObject',
+                     'state': 'UploadComplete', 'contentType': 'CSV', 'columnDelimiter': 'COMMA',
+                     'lineEnding': 'LF'}
+
+    def handle_job_status(self, request, job_id):
+        job = self.jobs.get(job_id)
+        if job is None:
+            return 404, [{'errorCode': 'NOT_FOUND', 'message': 'job not found'}]
+        with self._lock:
+            job['polls'] += 1
+            complete = job['polls'] > self.bulk_polls
+        return 200, {'id': job_id, 'operation': job['operation'],
+                     'state': 'JobComplete' if complete else 'InProgress',
+                     'numberRecordsProcessed': len(job['rows']) if complete else 0}
+
+    def handle_job_results(self, request, job_id):
+        job = self.jobs.get(job_id)
+        if job is None:
+            return 404, [{'errorCode': 'NOT_FOUND', 'message': 'job not found'}]
+        if job['polls'] <= self.bulk_polls:
+            return 400, [{'errorCode': 'INVALIDJOBSTATE', 'message': 'job is not complete'}]
+        offset = int(request['query'].get('locator') or 0)
+        max_records = int(request['query'].get('maxRecords') or 50000)
+        page = job['rows'][offset:offset + max_records]
+        next_offset = offset + len(page)
+
+        output = io.StringIO()
+        writer = csv.writer(output, lineterminator='\n', quoting=csv.QUOTE_ALL)
+        writer.writerow(job['fields'])
+        for row in page:
+            writer.writerow([csv_value(row[field]) for field in job['fields']])
+        headers = {
+            'Sforce-Locator': str(next_offset) if next_offset < len(job['rows']) else 'null',
+            'Sforce-NumberOfRecords': str(len(page)),
+        }
+        return 200, output.getvalue().encode('utf-8'), 'text/csv', headers
+
+    def dispatch(self, method, url, headers, body, log=True):
+        parsed = urlparse(url)
+        request = {
+            'path': parsed.path,
+            'query': {key: values[0] for key, values in parse_qs(parsed.query).items()},
+            'headers': headers,
+            'body': body,
+        }
+        if log:
+            with self._lock:
+                self.request_log.append((method, parsed.path))
+
+        for route_method, pattern, handler in self.routes:
+            match = pattern.match(parsed.path)
+            if route_method != method or not match:
+                continue
+            if handler != self.handle_token:
+                token = headers.get('Authorization', '').replace('Bearer ', '', 1)
+                if token not in self.valid_tokens:
+                    return 401, [{'errorCode': 'INVALID_SESSION_ID', 'message': 'Session expired or invalid'}]
+            return handler(request, **match.groupdict())
+        return 404, [{'errorCode': 'NOT_FOUND', 'message': f"No fake route for {method} {parsed.path}"}]
+
+    def start(self, port=0):
+        """Start serving on a local port in a daemon thread and return the base URL"""
+        fake = self
+
+        class FakeSalesforceHandler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body are written separately; without this, delayed ACKs add ~40ms per response
+            disable_nagle_algorithm = True
+
+            def _handle(self):
+                if fake.latency:
+                    time.sleep(fake.latency)
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+                result = fake.dispatch(self.command, self.path, self.headers, body)
+                status, payload = result[0], result[1]
+                content_type = result[2] if len(result) > 2 else 'application/json'
+                extra_headers = result[3] if len(result) > 3 else {}
+                data = payload if isinstance(payload, bytes) else json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                for name, value in extra_headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _handle
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), FakeSalesforceHandler)
+        self._server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        threading.Thread(target=self._server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+        return self.base_url
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,101 @@
+import pytest
+from config.salesforce_connection import SalesforceClient, SalesforceError
+from tests.fake_salesforce import FakeSalesforceServer
+
+ACCOUNTS = [{'Id': f'001{index:015d}', 'Name': f'Account {index}'} for index in range(60)]
+CONTACTS = [{'Id': f'003{index:015d}', 'LastName': f'Contact {index}', 'AccountId': ACCOUNTS[index]['Id']}
+            for index in range(60)]
+
+
+@pytest.fixture
+def server():
+    with FakeSalesforceServer() as fake:
+        fake.add_records('Account', ACCOUNTS)
+        fake.add_records('Contact', CONTACTS)
+        yield fake
+
+
+@pytest.fixture
+def client(server):
+    with SalesforceClient(login_url=server.login_url, username=server.username,
+                          password=server.password, security_token='') as sf:
+        yield sf
+
+
+# Test that independent GETs are split into Composite Batch calls of 25 with per-item errors
+def test_get_many_batches_and_keeps_errors(server, client):
+    paths = [f"sobjects/Account/{account['Id']}" for account in ACCOUNTS] + ['sobjects/Account/001999999999999999']
+
+    results = client.get_many(paths)
+
+    assert [result['Name'] for result in results[:60]] == [account['Name'] for account in ACCOUNTS]
+    assert isinstance(results[60], SalesforceError)
+    assert results[60].status_code == 404
+    assert server.api_requests() == [('POST', '/services/data/v58.0/composite/batch')] * 3
+
+
+# Test that dependent lookups stay together when composite requests are split
+def test_composite_resolves_references_across_splits(server, client):
+    subrequests = []
+    for index in range(20):
+        subrequests.append({'method': 'GET', 'url': f"sobjects/Contact/{CONTACTS[index]['Id']}",
+                            'referenceId': f'contact{index}'})
+        subrequests.append({'method': 'GET', 'url': f'sobjects/Account/@{{contact{index}.AccountId}}',
+                            'referenceId': f'account{index}'})
+    subrequests.append({'method': 'GET', 'url': 'sobjects/Contact/003999999999999999', 'referenceId': 'missing'})
+    subrequests.append({'method': 'GET', 'url': 'sobjects/Account/@{missing.AccountId}', 'referenceId': 'orphan'})
+
+    results = client.composite(subrequests)
+
+    assert [results[f'account{index}']['Name'] for index in range(20)] == [a['Name'] for a in ACCOUNTS[:20]]
+    assert results['missing'].status_code == 404
+    assert results['orphan'].errors[0]['errorCode'] == 'PROCESSING_HALTED'
+    assert len(server.api_requests()) == 2
+
+
+# Test that oversized dependency chains and unknown references are rejected up front
+def test_composite_rejects_unsplittable_requests(client):
+    chain = [{'method': 'GET', 'url': 'sobjects/Contact/x', 'referenceId': 'r0'}] + [
+        {'method': 'GET', 'url': f'sobjects/Contact/@{{r{index}.Id}}', 'referenceId': f'r{index + 1}'}
+        for index in range(25)
+    ]
+    with pytest.raises(ValueError):
+        client.composite(chain)
+    with pytest.raises(ValueError):
+        client.composite([{'method': 'GET', 'url': 'sobjects/Account/@{nope.Id}', 'referenceId': 'a'}])
+
+
+# Test that at most 5 query subrequests go in one composite call and all_or_none needs a single call
+def test_composite_limits_query_subrequests(server, client):
+    subrequests = [{'method': 'GET', 'url': f"query?q=SELECT+Id+FROM+Account+WHERE+Name='Account+{index}'",
+                    'referenceId': f'query{index}'} for index in range(7)]
+    subrequests.append({'method': 'GET', 'url': 'sobjects/Account/@{query6.records[0].Id}',
+                        'referenceId': 'account6'})
+
+    results = client.composite(subrequests)
+
+    assert [results[f'query{index}']['records'][0]['Id'] for index in range(7)] == \
+        [account['Id'] for account in ACCOUNTS[:7]]
+    assert results['account6']['Name'] == 'Account 6'
+    assert len(server.api_requests()) == 2
+    with pytest.raises(ValueError):
+        client.composite(subrequests, all_or_none=True)
+    # Six queries that all depend on the first cannot be split
+    dependent = subrequests[:1] + [
+        {'method': 'GET', 'url': f"query?q=SELECT+Id+FROM+Contact+WHERE+AccountId='@{{query0.records[0].Id}}'",
+         'referenceId': f'contacts{index}'} for index in range(5)
+    ]
+    with pytest.raises(ValueError):
+        client.composite(dependent)
+
+
+# Test that sObject Collections retrieve records by Id in chunks of 2000
+def test_retrieve_records(server, client, monkeypatch):
+    monkeypatch.setattr('config.salesforce_connection.COLLECTIONS_MAX_RETRIEVE', 50)
+    ids = [account['Id'] for account in ACCOUNTS] + ['001999999999999999']
+
+    records = client.retrieve_records('Account', ids, ['Id', 'Name'])
+
+    assert records[ACCOUNTS[59]['Id']]['Name'] == 'Account 59'
+    assert records['001999999999999999'] is None
+    assert len(server.api_requests()) == 2
@@ -0,0 +1,57 @@
+import pytest
+from config.salesforce_connection import SalesforceClient, SalesforceError
+from tests.fake_salesforce import FakeSalesforceServer
+
+
+@pytest.fixture
+def server():
+    with FakeSalesforceServer() as fake:
+        yield fake
+
+
+def make_client(server, **kwargs):
+    return SalesforceClient(login_url=server.login_url, client_id='id', client_secret='secret',
+                            username=server.username, password=server.password, security_token='', **kwargs)
+
+
+# Test that one token is reused across requests on the same client
+def test_client_authenticates_once(server):
+    server.add_records('Account', [{'Id': '001000000000001', 'Name': 'Acme'}])
+    with make_client(server) as client:
+        assert client.get('chatter/users/me')['username'] == server.username
+        assert client.get('sobjects/Account/001000000000001')['Name'] == 'Acme'
+    assert server.auth_count == 1
+    assert client.instance_url == server.base_url
+
+
+# Test that an expired session is refreshed transparently on 401
+def test_client_refreshes_on_401(server):
+    with make_client(server) as client:
+        client.get('chatter/users/me')
+        server.expire_tokens()
+        assert client.get('chatter/users/me')['username'] == server.username
+    assert server.auth_count == 2
+
+
+# Test that the token cache file lets a second client skip authentication
+def test_token_cache_is_shared_between_clients(server, tmp_path):
+    cache_path = tmp_path / 'token.json'
+    with make_client(server, token_cache_path=cache_path) as first:
+        first.get('chatter/users/me')
+    with make_client(server, token_cache_path=cache_path) as second:
+        second.get('chatter/users/me')
+    assert server.auth_count == 1
+    assert second.auth_count == 0
+    assert (cache_path.stat().st_mode & 0o777) == 0o600
+
+
+# Test that error responses surface as SalesforceError
+def test_client_raises_on_errors(server):
+    with make_client(server) as client:
+        with pytest.raises(SalesforceError) as error:
+            client.get('sobjects/Account/001000000000404')
+    assert error.value.status_code == 404
+    assert error.value.errors[0]['errorCode'] == 'NOT_FOUND'
+
+    with pytest.raises(SalesforceError):
+        SalesforceClient(login_url=server.login_url, username=server.username, password='wrong').authenticate()
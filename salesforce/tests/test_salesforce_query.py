@@ -0,0 +1,132 @@
+import pyarrow.parquet as pq
+import pytest
+import salesforce_query
+from config.salesforce_connection import SalesforceClient
+from salesforce_query import count_query, query_to_parquet
+from tests.fake_salesforce import FakeSalesforceServer
+
+ACCOUNTS = [
+    {'Id': f'001{index:015d}', 'Name': f'Account "{index}", Inc', 'AnnualRevenue': index * 1000,
+     'IsActive': index % 2 == 0, 'Description': None if index % 3 else 'multi\nline',
+     'CreatedDate': f'2024-01-15T18:20:{index:02d}.000+0000'}
+    for index in range(25)
+]
+SOQL = 'SELECT Id, Name, AnnualRevenue, IsActive, Description, CreatedDate FROM Account ORDER BY Id'
+
+
+@pytest.fixture
+def server():
+    with FakeSalesforceServer(rest_batch_size=10) as fake:
+        fake.add_records('Account', ACCOUNTS)
+        yield fake
+
+
+@pytest.fixture
+def client(server, monkeypatch):
+    monkeypatch.setattr(salesforce_query, 'POLL_INTERVAL', 0.01)
+    with SalesforceClient(login_url=server.login_url, username=server.username,
+                          password=server.password, security_token='') as sf:
+        yield sf
+
+
+def expected_rows():
+    return [
+        {'Id': account['Id'], 'Name': account['Name'], 'AnnualRevenue': str(account['AnnualRevenue']),
+         'IsActive': 'true' if account['IsActive'] else 'false', 'Description': account['Description'],
+         'CreatedDate': account['CreatedDate'].replace('+0000', 'Z')}
+        for account in ACCOUNTS
+    ]
+
+
+# Test that small results stay on REST query/queryMore pagination
+def test_small_query_uses_rest(server, client, tmp_path):
+    result = query_to_parquet(client, SOQL, tmp_path / 'accounts.parquet')
+
+    assert result == {'mode': 'rest', 'rows': 25}
+    assert pq.read_table(tmp_path / 'accounts.parquet').to_pylist() == expected_rows()
+    assert [path for _, path in server.api_requests()].count('/services/data/v58.0/query/1-10') == 1
+    assert not server.jobs
+
+
+# Test that large results go through a Bulk API 2.0 job streamed page by page
+def test_large_query_uses_bulk(server, client, tmp_path):
+    result = query_to_parquet(client, SOQL, tmp_path / 'accounts.parquet', bulk_threshold=20,
+                              page_size=4, max_concurrency=3)
+
+    assert result == {'mode': 'bulk', 'rows': 25}
+    assert pq.read_table(tmp_path / 'accounts.parquet').to_pylist() == expected_rows()
+    # The size probe was a COUNT(), so no REST page of records was downloaded
+    assert not server.cursors
+    result_requests = [path for _, path in server.api_requests('GET') if path.endswith('/results')]
+    assert len(result_requests) == 7
+    # Both paths produce the same schema and the same values, datetimes included
+    rest_path = tmp_path / 'rest.parquet'
+    assert query_to_parquet(client, SOQL, rest_path)['mode'] == 'rest'
+    assert pq.read_schema(rest_path) == pq.read_schema(tmp_path / 'accounts.parquet')
+    assert pq.read_table(rest_path).column('CreatedDate').to_pylist() == \
+        pq.read_table(tmp_path / 'accounts.parquet').column('CreatedDate').to_pylist()
+
+
+# Test that queryAll includes deleted records and empty results still produce a file
+def test_include_deleted_and_empty_results(server, client, tmp_path):
+    server.add_records('Account', [{'Id': '001999999999999999', 'Name': 'Gone', 'IsDeleted': True}])
+    soql = "SELECT Id, Name FROM Account WHERE Name = 'Gone'"
+
+    assert query_to_parquet(client, soql, tmp_path / 'live.parquet', force_bulk=True)['rows'] == 0
+    assert pq.read_table(tmp_path / 'live.parquet').num_rows == 0
+    assert pq.read_schema(tmp_path / 'live.parquet').names == ['Id', 'Name']
+    result = query_to_parquet(client, soql, tmp_path / 'all.parquet', include_deleted=True, force_bulk=True)
+    assert result['rows'] == 1
+    assert pq.read_table(tmp_path / 'all.parquet').column('Name').to_pylist() == ['Gone']
+
+
+# Test that a null lookup on the first record keeps the relationship's columns
+def test_null_relationship_on_first_record(server, client, tmp_path):
+    server.add_records('Contact', [
+        {'Id': '003000000000000001', 'LastName': 'Orphan', 'Account.Name': None},
+        {'Id': '003000000000000002', 'LastName': 'Linked', 'Account.Name': 'Acme'},
+    ])
+    soql = 'SELECT Id, LastName, Account.Name FROM Contact ORDER BY Id'
+
+    assert query_to_parquet(client, soql, tmp_path / 'rest.parquet')['mode'] == 'rest'
+    query_to_parquet(client, soql, tmp_path / 'bulk.parquet', force_bulk=True)
+
+    rest_table = pq.read_table(tmp_path / 'rest.parquet')
+    assert rest_table.column('Account.Name').to_pylist() == [None, 'Acme']
+    assert rest_table.equals(pq.read_table(tmp_path / 'bulk.parquet'))
+    assert rest_table.column_names == ['Id', 'LastName', 'Account.Name']
+
+
+# Test that Bulk pages larger than one CSV block parse quoted line breaks
+def test_bulk_page_with_multiline_values(server, client, tmp_path):
+    description = 'first line\nsecond, "quoted" line\n' * 20
+    notes = [{'Id': f'002{index:015d}', 'Body': f'{index}: {description}'} for index in range(2000)]
+    server.add_records('Note', notes)
+
+    result = query_to_parquet(client, 'SELECT Id, Body FROM Note ORDER BY Id', tmp_path / 'notes.parquet',
+                              force_bulk=True, page_size=5000)
+
+    assert result == {'mode': 'bulk', 'rows': 2000}
+    assert sum(len(note['Body']) for note in notes) > 1 << 20
+    assert pq.read_table(tmp_path / 'notes.parquet').to_pylist() == notes
+
+
+# Test that a query failing part way through leaves no output file behind
+def test_failed_query_leaves_no_file(server, client, tmp_path, monkeypatch):
+    def failing_pages(*args, **kwargs):
+        yield b'"Id"\n"001000000000000000"\n'
+        raise ConnectionError('connection reset')
+    monkeypatch.setattr(salesforce_query, 'bulk_result_pages', failing_pages)
+
+    with pytest.raises(ConnectionError):
+        query_to_parquet(client, SOQL, tmp_path / 'accounts.parquet', force_bulk=True)
+    assert list(tmp_path.iterdir()) == []
+
+
+# Test that the size probe keeps the query's FROM, WHERE and LIMIT but not its select list or ORDER BY
+def test_count_query():
+    assert count_query("SELECT Id, Name FROM Account WHERE Name = 'Acme' ORDER BY Id LIMIT 10") == \
+        "SELECT COUNT() FROM Account WHERE Name = 'Acme' LIMIT 10"
+    assert count_query('SELECT Id FROM Account') == 'SELECT COUNT() FROM Account'
+    assert count_query('SELECT Id, (SELECT Id FROM Contacts) FROM Account') is None
+    assert count_query('SELECT Name FROM Account GROUP BY Name') is None
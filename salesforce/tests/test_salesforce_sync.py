@@ -0,0 +1,144 @@
+from datetime import datetime, timedelta, timezone
+
+import pyarrow.parquet as pq
+import pytest
+from config.salesforce_connection import SalesforceClient
+from salesforce_sync import ObjectSync
+from tests.fake_salesforce import FakeSalesforceServer
+
+BASE_TIME = datetime.now(timezone.utc).replace(microsecond=0) - timedelta(days=1)
+
+
+def modstamp(minutes):
+    return (BASE_TIME + timedelta(minutes=minutes)).strftime('%Y-%m-%dT%H:%M:%S.000+0000')
+
+
+@pytest.fixture
+def server():
+    with FakeSalesforceServer() as fake:
+        fake.add_records('Account', [
+            {'Id': f'001{index:015d}', 'Name': f'Account {index}', 'SystemModstamp': modstamp(index),
+             'IsDeleted': False}
+            for index in range(20)
+        ])
+        yield fake
+
+
+@pytest.fixture
+def sync(server, tmp_path):
+    with SalesforceClient(login_url=server.login_url, username=server.username,
+                          password=server.password, security_token='') as client:
+        yield ObjectSync(client, tmp_path)
+
+
+def local_names(sync):
+    rows = pq.read_table(sync.table_path('Account')).to_pylist()
+    return {row['Id']: row['Name'] for row in rows}
+
+
+# Test that a second run only transfers changed and deleted records and merges them by Id
+def test_incremental_sync_merges_changes(server, sync):
+    assert sync.sync('Account', ['Name']) == {'mode': 'full', 'changed': 20, 'deleted': 0, 'rows': 20}
+
+    server.add_records('Account', [
+        {'Id': '001000000000000003', 'Name': 'Renamed', 'SystemModstamp': modstamp(60), 'IsDeleted': False},
+        {'Id': '001000000000000099', 'Name': 'New', 'SystemModstamp': modstamp(61), 'IsDeleted': False},
+    ])
+    server.delete_records('Account', ['001000000000000005'], modstamp(62))
+    server.request_log.clear()
+
+    result = sync.sync('Account', ['Name'])
+
+    # Records inside the 5 minute lookback (modstamps 14-19) are fetched again and absorbed by the merge
+    assert result == {'mode': 'incremental', 'changed': 8, 'deleted': 1, 'rows': 20}
+    names = local_names(sync)
+    assert names['001000000000000003'] == 'Renamed'
+    assert names['001000000000000099'] == 'New'
+    assert '001000000000000005' not in names
+    # A COUNT() probe, one REST query page for changes and one getDeleted call
+    assert [path for _, path in server.api_requests()] == [
+        '/services/data/v58.0/query', '/services/data/v58.0/query', '/services/data/v58.0/sobjects/Account/deleted/',
+    ]
+    assert sync.load_watermarks()['Account']['watermark'].startswith(modstamp(61)[:19])
+
+
+# Test that deletions outside the getDeleted window fall back to queryAll on IsDeleted
+def test_deletions_fall_back_to_query_all(server, sync):
+    sync.sync('Account', ['Name'])
+    server.delete_records('Account', ['001000000000000007'], modstamp(30))
+    server.get_deleted_earliest = modstamp(600)
+
+    result = sync.sync('Account', ['Name'])
+
+    assert result['deleted'] == 1
+    assert '001000000000000007' not in local_names(sync)
+    assert any(path.endswith('/queryAll') for _, path in server.api_requests())
+
+
+# Test that changing the field list triggers a full re-extract
+def test_field_change_forces_full_sync(server, sync):
+    sync.sync('Account', ['Name'])
+    assert sync.sync('Account', ['Name', 'IsDeleted'])['mode'] == 'full'
+    assert pq.read_schema(sync.table_path('Account')).names == ['Id', 'SystemModstamp', 'Name', 'IsDeleted']
+
+
+# Test that a run with no changes since the watermark still applies deletions and keeps the watermark
+def test_no_changes_since_watermark(server, sync):
+    sync.sync('Account', ['Name'])
+    watermark = sync.load_watermarks()['Account']['watermark']
+    server.delete_records('Account', ['001000000000000019'], modstamp(62))
+
+    # Only the lookback window (modstamps 14-18) is re-read
+    assert sync.sync('Account', ['Name']) == {'mode': 'incremental', 'changed': 5, 'deleted': 1, 'rows': 19}
+    assert '001000000000000019' not in local_names(sync)
+    assert sync.load_watermarks()['Account']['watermark'] == watermark
+
+
+# Test that an object without records syncs to an empty typed table
+def test_empty_object(server, sync):
+    assert sync.sync('Contact', ['LastName']) == {'mode': 'full', 'changed': 0, 'deleted': 0, 'rows': 0}
+    assert pq.read_schema(sync.table_path('Contact')).names == ['Id', 'SystemModstamp', 'LastName']
+    assert sync.load_watermarks()['Contact']['watermark'] == '1970-01-01T00:00:00+00:00'
+
+    server.add_records('Contact', [{'Id': '003000000000000001', 'LastName': 'First',
+                                    'SystemModstamp': modstamp(5), 'IsDeleted': False}])
+    assert sync.sync('Contact', ['LastName'])['rows'] == 1
+
+
+# Test that deletions after getDeleted's latestDateCovered are picked up on the next run
+def test_deletions_after_latest_date_covered(server, sync):
+    sync.sync('Account', ['Name'])
+    server.get_deleted_latest = modstamp(62)
+    server.delete_records('Account', ['001000000000000002'], modstamp(61))
+    server.delete_records('Account', ['001000000000000004'], modstamp(63))
+    server.add_records('Account', [
+        {'Id': '001000000000000006', 'Name': 'Renamed', 'SystemModstamp': modstamp(64), 'IsDeleted': False},
+    ])
+
+    assert sync.sync('Account', ['Name'])['deleted'] == 1
+    assert '001000000000000004' in local_names(sync)
+    assert sync.load_watermarks()['Account']['deleted_watermark'].startswith(modstamp(62)[:19])
+
+    server.get_deleted_latest = None
+    sync.sync('Account', ['Name'])
+    assert '001000000000000004' not in local_names(sync)
+
+
+# Test that a record committed after a run with an earlier SystemModstamp is caught by the lookback
+def test_lookback_catches_late_commits(server, sync):
+    sync.sync('Account', ['Name'])
+    watermark = sync.load_watermarks()['Account']['watermark']
+    server.add_records('Account', [
+        {'Id': '001000000000000098', 'Name': 'Late', 'SystemModstamp': modstamp(17), 'IsDeleted': False},
+    ])
+
+    sync.sync('Account', ['Name'])
+
+    assert local_names(sync)['001000000000000098'] == 'Late'
+    assert sync.load_watermarks()['Account']['watermark'] == watermark
+    sync.lookback = timedelta(0)
+    server.add_records('Account', [
+        {'Id': '001000000000000097', 'Name': 'Missed', 'SystemModstamp': modstamp(18), 'IsDeleted': False},
+    ])
+    sync.sync('Account', ['Name'])
+    assert '001000000000000097' not in local_names(sync)